@@ -0,0 +1,273 @@
+"""Startup benchmark for plugin dispatch.
+
+Each run starts a fresh interpreter (like Kodi does for every click), imports
+resources.lib.plugin against the stub xbmc* modules in ./stubs and dispatches a
+single route. HTTP is answered from the recorded responses in ./fixtures.
+
+    python benchmarks/bench.py                  # all routes, 20 runs each
+    python benchmarks/bench.py -r home -r play  # selected routes
+    python benchmarks/bench.py --cold           # wipe the profile before every run
+    python benchmarks/bench.py --latency 300    # add 300ms to every response
+    python benchmarks/bench.py --check-broker   # check requests keep their query through the broker
+
+Phase times are exclusive and measured on the main thread only. The first run
+of each route starts with an empty profile, later runs reuse its cache unless
+--cold is given.
+"""
+from __future__ import print_function
+
+import os
+import sys
+import json
+import time
+import shutil
+import tempfile
+import argparse
+import threading
+import subprocess
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT_DIR  = os.path.dirname(BENCH_DIR)
+FIXTURES  = os.path.join(BENCH_DIR, 'fixtures', 'responses.json')
+
+PHASES = ['import', 'db', 'network', 'render', 'total']
+
+ROUTES = [
+    ('home',     '?_='),
+    ('sports',   '?_=sports'),
+    ('sport',    '?_=sport&slug=afl&title=AFL'),
+    ('panel',    '?_=panel&id=panel00'),
+    ('show',     '?_=show&id=show01&title=Show+1'),
+    ('play',     '?_=play&id=asset0001&play_type=1'),
+    ('_service', '?_=_service'),
+]
+
+SETTINGS = {
+    '_userdata': json.dumps({
+        'access_token': 'bench',
+        'refresh_token': 'bench',
+        'expires': 4102444800,
+        'alerts': ['asset0001', 'asset0002', 'asset0003'],
+    }),
+    'use_ia_hls': 'true',
+}
+
+class Timer(object):
+    def __init__(self):
+        self.totals = dict((phase, 0.0) for phase in PHASES)
+        self._local = threading.local()
+
+    def wrap(self, phase, func):
+        def wrapped(*args, **kwargs):
+            if threading.current_thread().name != 'MainThread':
+                return func(*args, **kwargs)
+
+            stack = self._local.__dict__.setdefault('stack', [])
+            if stack and stack[-1][0] == phase:
+                return func(*args, **kwargs)
+
+            stack.append([phase, time.time(), 0.0])
+            try:
+                return func(*args, **kwargs)
+            finally:
+                _phase, _start, children = stack.pop()
+                elapsed = time.time() - _start
+                self.totals[_phase] += elapsed - children
+                if stack:
+                    stack[-1][2] += elapsed
+
+        return wrapped
+
+def _fake_send(responses, latency):
+    import requests
+
+    def send(self, request, **kwargs):
+        for row in responses:
+            if row['url'] in request.url:
+                break
+        else:
+            row = {'status': 404, 'body': {}}
+
+        if latency:
+            time.sleep(latency / 1000.0)
+
+        response = requests.models.Response()
+        response.status_code = row.get('status', 200)
+        response._content    = json.dumps(row['body']).encode('utf-8')
+        response.headers['Content-Type'] = 'application/json'
+        response.url     = request.url
+        response.request = request
+        return response
+
+    return send
+
+def child(url):
+    start = time.time()
+    timer = Timer()
+
+    sys.path.insert(0, os.path.join(BENCH_DIR, 'stubs'))
+    sys.path.insert(0, ROOT_DIR)
+    sys.argv = ['plugin://plugin.video.kayo.sports/', '1', url]
+
+    with open(FIXTURES) as f:
+        responses = json.load(f)
+
+    latency = float(os.environ.get('BENCH_LATENCY', 0))
+
+    from resources.lib.matthuisman import util
+    lazy_import = util.lazy_import
+
+    #patch the heavy modules as they are lazily imported by the addon
+    def bench_import(name, package=None):
+        module = lazy_import(name, package)
+
+        if module.__name__.endswith('.database') and not hasattr(module.db, '_bench'):
+            module.db._bench = True
+            module.db.execute_sql = timer.wrap('db', module.db.execute_sql)
+            module.db.connect = timer.wrap('db', module.db.connect)
+
+        elif module.__name__.endswith('.session') and not hasattr(module.Session, '_bench'):
+            import requests
+            module.Session._bench = True
+            module.Session.request = timer.wrap('network', module.Session.request)
+            requests.adapters.HTTPAdapter.send = _fake_send(responses, latency)
+
+        return module
+
+    util.lazy_import = timer.wrap('import', bench_import)
+
+    from resources.lib.plugin import plugin
+    from resources.lib.matthuisman import plugin as _plugin, signals
+
+    timer.totals['import'] += time.time() - start
+
+    _plugin.Folder.display = timer.wrap('render', _plugin.Folder.display)
+    _plugin.Item.play = timer.wrap('render', _plugin.Item.play)
+
+    errors = []
+    signals.on(signals.ON_ERROR)(errors.append)
+    signals.on(signals.ON_EXCEPTION)(errors.append)
+
+    plugin.dispatch(url)
+
+    if errors:
+        sys.exit('{} failed: {}'.format(url, errors[0]))
+
+    timer.totals['total'] = time.time() - start
+    print(json.dumps(timer.totals))
+
+#Requests made with params must reach upstream with their query string through the broker,
+#and requests to other hosts are refused by it and sent directly
+def check_broker():
+    profile = tempfile.mkdtemp(prefix='kayo-broker-')
+    os.environ['BENCH_PROFILE']  = profile
+    os.environ['BENCH_SETTINGS'] = json.dumps({'use_broker': 'true'})
+
+    sys.path.insert(0, os.path.join(BENCH_DIR, 'stubs'))
+    sys.path.insert(0, ROOT_DIR)
+
+    import requests
+
+    with open(FIXTURES) as f:
+        fake_send = _fake_send(json.load(f), 0)
+
+    send     = requests.adapters.HTTPAdapter.send
+    upstream = []
+
+    def broker_send(self, request, **kwargs):
+        if request.url.startswith('http://127.0.0.1'):
+            return send(self, request, **kwargs)
+
+        upstream.append((threading.current_thread().name != 'MainThread', request.method, request.url))
+        return fake_send(self, request, **kwargs)
+
+    requests.adapters.HTTPAdapter.send = broker_send
+
+    from resources.lib.matthuisman import broker, session
+    from resources.lib.constants import BROKER_HOSTS
+
+    broker.start(BROKER_HOSTS)
+    try:
+        s = session.Session()
+        s.get('https://vccapi.kayosports.com.au/content/types/landing/names/home', params=[('evaluate', 99), ('profile', 'abc')])
+        s.post('https://vmndplay.kayosports.com.au/api/v1/asset/asset0001/play', params={'fields': 'alternativeStreams'}, json={})
+        s.get('https://vmndims.kayosports.com.au/content/types/landing/names/home')
+    finally:
+        broker.stop()
+        shutil.rmtree(profile, ignore_errors=True)
+
+    expected = [
+        (True, 'GET', 'https://vccapi.kayosports.com.au/content/types/landing/names/home?evaluate=99&profile=abc'),
+        (True, 'POST', 'https://vmndplay.kayosports.com.au/api/v1/asset/asset0001/play?fields=alternativeStreams'),
+        (False, 'GET', 'https://vmndims.kayosports.com.au/content/types/landing/names/home'),
+    ]
+
+    if upstream != expected:
+        sys.exit('Broker check failed: {} != {}'.format(upstream, expected))
+
+    print('Broker check passed')
+
+def percentile(values, pct):
+    values = sorted(values)
+    index  = int(round(pct / 100.0 * (len(values) - 1)))
+    return values[index]
+
+def run(name, url, runs, profile, cold, latency):
+    env = dict(os.environ)
+    env['BENCH_PROFILE']  = profile
+    env['BENCH_SETTINGS'] = json.dumps(SETTINGS)
+    env['BENCH_LATENCY']  = str(latency)
+
+    results = []
+    for i in range(runs):
+        if cold or i == 0:
+            shutil.rmtree(profile, ignore_errors=True)
+
+        process = subprocess.Popen([sys.executable, os.path.abspath(__file__), '--child', url], env=env,
+            stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        output, error = process.communicate()
+
+        if process.returncode != 0:
+            raise SystemExit(error.decode('utf-8'))
+
+        results.append(json.loads(output.decode('utf-8').strip().splitlines()[-1]))
+
+    return results
+
+def report(name, results):
+    print('{:<10} {:<8} {:>8} {:>8} {:>8} {:>8}'.format(name, 'phase', 'p50', 'p90', 'p99', 'max'))
+
+    for phase in PHASES:
+        values = [row[phase] * 1000 for row in results]
+        print('{:<10} {:<8} {:>8.1f} {:>8.1f} {:>8.1f} {:>8.1f}'.format('', phase, percentile(values, 50),
+            percentile(values, 90), percentile(values, 99), max(values)))
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark plugin dispatch per route')
+    parser.add_argument('-r', '--route', action='append', choices=[r[0] for r in ROUTES], help='route to run (default: all)')
+    parser.add_argument('-n', '--runs', type=int, default=20, help='runs per route')
+    parser.add_argument('--cold', action='store_true', help='start every run with an empty profile')
+    parser.add_argument('--latency', type=float, default=0, help='milliseconds added to every response')
+    parser.add_argument('--check-broker', action='store_true', help='check requests keep their query through the broker')
+    parser.add_argument('--child', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.check_broker:
+        return check_broker()
+
+    if args.child is not None:
+        return child(args.child)
+
+    profile = tempfile.mkdtemp(prefix='kayo-bench-')
+
+    try:
+        for name, url in ROUTES:
+            if args.route and name not in args.route:
+                continue
+
+            report(name, run(name, url, args.runs, profile, args.cold, args.latency))
+    finally:
+        shutil.rmtree(profile, ignore_errors=True)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,107 @@
+"""Folder rendering benchmark.
+
+Parses a panel of N video clips (the recorded panel fixture repeated) and times
+Folder.display with the batched addDirectoryItems path against one
+addDirectoryItem call per item. Every xbmcplugin call can be given a fixed cost
+to stand in for crossing from Python into Kodi.
+
+    python benchmarks/render.py                    # 100 and 500 items, 50 runs each
+    python benchmarks/render.py -i 1000 -n 20      # 1000 items, 20 runs
+    python benchmarks/render.py --call-cost 50     # 50us per xbmcplugin call
+
+Item parsing is not timed, only display.
+"""
+from __future__ import print_function
+
+import os
+import sys
+import json
+import time
+import shutil
+import tempfile
+import argparse
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT_DIR  = os.path.dirname(BENCH_DIR)
+FIXTURES  = os.path.join(BENCH_DIR, 'fixtures', 'responses.json')
+
+MODES = [('batch', True), ('single', False)]
+
+def _rows(count):
+    with open(FIXTURES) as f:
+        responses = json.load(f)
+
+    panel = [r['body'] for r in responses if 'content/types/carousel/keys/' in r['url']][0][0]
+    videos = [row for row in panel['contents'] if row['contentType'] == 'video']
+
+    rows = []
+    for i in range(count):
+        row = json.loads(json.dumps(videos[i % len(videos)]))
+        row['data']['asset']['id'] = 'bench{:05d}'.format(i)
+        rows.append(row)
+
+    return rows
+
+def _costly(func, cost):
+    def wrapped(*args, **kwargs):
+        end = time.time() + cost
+        while time.time() < end:
+            pass
+
+        return func(*args, **kwargs)
+
+    return wrapped
+
+def percentile(values, pct):
+    values = sorted(values)
+    index  = int(round(pct / 100.0 * (len(values) - 1)))
+    return values[index]
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark Folder.display with and without addDirectoryItems')
+    parser.add_argument('-i', '--items', type=int, action='append', help='items per folder (default: 100 and 500)')
+    parser.add_argument('-n', '--runs', type=int, default=50, help='runs per mode')
+    parser.add_argument('--call-cost', type=float, default=20, help='microseconds added to every xbmcplugin call')
+    args = parser.parse_args()
+
+    profile = tempfile.mkdtemp(prefix='kayo-render-')
+    os.environ['BENCH_PROFILE'] = profile
+
+    sys.path.insert(0, os.path.join(BENCH_DIR, 'stubs'))
+    sys.path.insert(0, ROOT_DIR)
+    sys.argv = ['plugin://plugin.video.kayo.sports/', '1', '?_=panel']
+
+    import xbmcplugin
+
+    cost = args.call_cost / 1000000.0
+    for name in ('addDirectoryItem', 'addDirectoryItems', 'setContent', 'setPluginCategory', 'addSortMethod', 'endOfDirectory'):
+        setattr(xbmcplugin, name, _costly(getattr(xbmcplugin, name), cost))
+
+    from resources.lib import plugin
+    from resources.lib.matthuisman import plugin as _plugin
+
+    try:
+        print('{:<8} {:<8} {:>8} {:>8} {:>8}'.format('items', 'mode', 'p50', 'p90', 'max'))
+
+        for count in args.items or [100, 500]:
+            rows = _rows(count)
+
+            for mode, batch in MODES:
+                results = []
+
+                for i in range(args.runs):
+                    folder = _plugin.Folder(items=plugin._parse_contents(rows), title='Bench', batch=batch)
+                    del xbmcplugin.items[:]
+
+                    start = time.time()
+                    folder.display()
+                    results.append((time.time() - start) * 1000)
+
+                    assert len(xbmcplugin.items) == count
+
+                print('{:<8} {:<8} {:>8.1f} {:>8.1f} {:>8.1f}'.format(count, mode, percentile(results, 50), percentile(results, 90), max(results)))
+    finally:
+        shutil.rmtree(profile, ignore_errors=True)
+
+if __name__ == '__main__':
+    main()
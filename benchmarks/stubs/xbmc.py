@@ -0,0 +1,42 @@
+import os
+
+LOGDEBUG, LOGINFO, LOGNOTICE, LOGWARNING, LOGERROR, LOGSEVERE, LOGFATAL, LOGNONE = range(8)
+
+def log(msg, level=LOGDEBUG):
+    if os.environ.get('BENCH_VERBOSE'):
+        print(msg)
+
+def translatePath(path):
+    return path
+
+def executebuiltin(function, wait=False):
+    pass
+
+def executeJSONRPC(jsonrpccommand):
+    return '{}'
+
+def getInfoLabel(infotag):
+    return '18.2 Git:bench'
+
+def getCondVisibility(condition):
+    return False
+
+def sleep(time):
+    pass
+
+class Monitor(object):
+    def abortRequested(self):
+        return True
+
+    def waitForAbort(self, timeout=0):
+        return True
+
+class Player(object):
+    def play(self, item='', listitem=None, windowed=False, startpos=-1):
+        pass
+
+    def isPlaying(self):
+        return False
+
+    def isPlayingVideo(self):
+        return False
@@ -0,0 +1,45 @@
+import os
+import re
+import json
+
+_root     = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+_settings = json.loads(os.environ.get('BENCH_SETTINGS', '{}'))
+_strings  = {}
+
+def _load_strings():
+    path = os.path.join(_root, 'resources', 'language', 'resource.language.en_gb', 'strings.po')
+    with open(path) as f:
+        data = f.read()
+
+    for id, msgid in re.findall(r'msgctxt "#(\d+)"\nmsgid "((?:[^"]|"\n")*)"', data):
+        _strings[int(id)] = msgid.replace('"\n"', '').replace('\\n', '\n')
+
+class Addon(object):
+    def __init__(self, id=None):
+        self._id = id or 'plugin.video.kayo.sports'
+
+    def getAddonInfo(self, id):
+        return {
+            'id': self._id,
+            'name': 'Kayo Sports',
+            'version': '2.2.0' if self._id == 'inputstream.adaptive' else '0.2.1',
+            'path': _root,
+            'profile': os.environ.get('BENCH_PROFILE', os.path.join(_root, '.tmp', 'profile')),
+            'icon': os.path.join(_root, 'icon.png'),
+            'fanart': os.path.join(_root, 'fanart.jpg'),
+        }.get(id, '')
+
+    def getSetting(self, id):
+        return _settings.get(id, '')
+
+    def setSetting(self, id, value):
+        _settings[id] = value
+
+    def getLocalizedString(self, id):
+        if not _strings:
+            _load_strings()
+
+        return _strings.get(id, '')
+
+    def openSettings(self):
+        pass
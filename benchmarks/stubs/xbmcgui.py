@@ -0,0 +1,93 @@
+ALPHANUM_HIDE_INPUT = 1
+
+_properties = {}
+
+class Window(object):
+    def __init__(self, existingWindowId=-1):
+        pass
+
+    def getProperty(self, key):
+        return _properties.get(key, '')
+
+    def setProperty(self, key, value):
+        _properties[key] = value
+
+    def clearProperty(self, key):
+        _properties.pop(key, None)
+
+class ListItem(object):
+    def __init__(self, label='', label2='', path='', offscreen=False):
+        self._label = label
+        self._path  = path
+        self._props = {}
+
+    def setLabel(self, label):
+        self._label = label
+
+    def getLabel(self):
+        return self._label
+
+    def setPath(self, path):
+        self._path = path
+
+    def getPath(self):
+        return self._path
+
+    def setInfo(self, type, infoLabels):
+        pass
+
+    def addStreamInfo(self, cType, dictionary):
+        pass
+
+    def setArt(self, dictionary):
+        pass
+
+    def setProperty(self, key, value):
+        self._props[key] = value
+
+    def getProperty(self, key):
+        return self._props.get(key, '')
+
+    def addContextMenuItems(self, items, replaceItems=False):
+        pass
+
+    def setSubtitles(self, subtitleFiles):
+        pass
+
+    def setMimeType(self, mimetype):
+        pass
+
+    def setContentLookup(self, enable):
+        pass
+
+class Dialog(object):
+    def notification(self, heading, message, icon='', time=0, sound=True):
+        pass
+
+    def select(self, heading, list, *args, **kwargs):
+        return 0
+
+    def ok(self, heading, *lines):
+        return True
+
+    def yesno(self, heading, *lines, **kwargs):
+        return True
+
+    def input(self, heading, defaultt='', *args, **kwargs):
+        return ''
+
+    def textviewer(self, heading, text):
+        pass
+
+class DialogProgress(object):
+    def create(self, heading, *lines):
+        pass
+
+    def update(self, percent, *lines):
+        pass
+
+    def iscanceled(self):
+        return False
+
+    def close(self):
+        pass
@@ -0,0 +1,28 @@
+SORT_METHOD_UNSORTED  = 0
+SORT_METHOD_LABEL     = 1
+SORT_METHOD_DATEADDED = 21
+
+items = []
+
+def addDirectoryItem(handle, url, listitem, isFolder=False, totalItems=0):
+    items.append((url, listitem, isFolder))
+    return True
+
+def addDirectoryItems(handle, items_, totalItems=0):
+    items.extend(items_)
+    return True
+
+def setContent(handle, content):
+    pass
+
+def setPluginCategory(handle, category):
+    pass
+
+def addSortMethod(handle, sortMethod, label2Mask=''):
+    pass
+
+def endOfDirectory(handle, succeeded=True, updateListing=False, cacheToDisc=True):
+    pass
+
+def setResolvedUrl(handle, succeeded, listitem):
+    pass
@@ -0,0 +1,85 @@
+"""Timestamp parsing benchmark.
+
+Parses transmissionTime and preCheckTime and humanizes the start of every video
+in a panel of N items (the recorded panel fixture repeated), once with arrow
+and once with matthuisman.timestamp.
+
+    python benchmarks/timestamps.py             # 500 items, 50 runs
+    python benchmarks/timestamps.py -i 1000     # 1000 items
+"""
+from __future__ import print_function
+
+import os
+import sys
+import json
+import time
+import argparse
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT_DIR  = os.path.dirname(BENCH_DIR)
+FIXTURES  = os.path.join(BENCH_DIR, 'fixtures', 'responses.json')
+
+def _assets(count):
+    with open(FIXTURES) as f:
+        responses = json.load(f)
+
+    panel  = [r['body'] for r in responses if 'content/types/carousel/keys/' in r['url']][0][0]
+    assets = [row['data']['asset'] for row in panel['contents'] if row['contentType'] == 'video']
+
+    return [assets[i % len(assets)] for i in range(count)]
+
+def with_arrow(assets):
+    import arrow
+
+    for asset in assets:
+        now   = arrow.now()
+        start = arrow.get(asset['transmissionTime'])
+        if 'preCheckTime' in asset:
+            arrow.get(asset['preCheckTime'])
+        start.humanize()
+
+def with_timestamp(assets):
+    from resources.lib.matthuisman import timestamp
+
+    timestamp.reset()
+    now = timestamp.now()
+
+    for asset in assets:
+        start = timestamp.parse(asset['transmissionTime'])
+        if 'preCheckTime' in asset:
+            timestamp.parse(asset['preCheckTime'])
+        timestamp.humanize(start, now)
+
+def percentile(values, pct):
+    values = sorted(values)
+    index  = int(round(pct / 100.0 * (len(values) - 1)))
+    return values[index]
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark arrow against matthuisman.timestamp')
+    parser.add_argument('-i', '--items', type=int, default=500, help='videos in the panel')
+    parser.add_argument('-n', '--runs', type=int, default=50, help='runs per parser')
+    args = parser.parse_args()
+
+    sys.path.insert(0, os.path.join(BENCH_DIR, 'stubs'))
+    sys.path.insert(0, ROOT_DIR)
+
+    assets = _assets(args.items)
+
+    print('{:<10} {:>8} {:>8} {:>8}'.format('parser', 'p50', 'p90', 'max'))
+
+    for name, func in (('arrow', with_arrow), ('timestamp', with_timestamp)):
+        start = time.time()
+        func(assets[:1])
+        first = (time.time() - start) * 1000
+
+        results = []
+        for i in range(args.runs):
+            start = time.time()
+            func(assets)
+            results.append((time.time() - start) * 1000)
+
+        print('{:<10} {:>8.1f} {:>8.1f} {:>8.1f}   (first call incl. import {:.1f})'.format(name, percentile(results, 50), percentile(results, 90), max(results), first))
+
+if __name__ == '__main__':
+    main()
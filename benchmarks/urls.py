@@ -0,0 +1,95 @@
+"""URL building benchmark.
+
+Builds the four plugin urls _parse_video makes for each video in a panel of N
+items, with the current router and with the previous linear-scan router kept
+below for comparison. Both must produce the same urls.
+
+    python benchmarks/urls.py              # 1000 items, 50 runs
+    python benchmarks/urls.py -i 300
+"""
+from __future__ import print_function
+
+import os
+import sys
+import time
+import argparse
+from urllib import urlencode
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT_DIR  = os.path.dirname(BENCH_DIR)
+
+def legacy(router):
+    from resources.lib.matthuisman.constants import ROUTE_TAG, ADDON_ID, ROUTE_LIVE_TAG, ROUTE_LIVE_SUFFIX
+
+    def build_url(url, is_live=False, addon_id=ADDON_ID, **kwargs):
+        kwargs[ROUTE_TAG] = url
+
+        params = []
+        for k in sorted(kwargs):
+            if kwargs[k] == None:
+                continue
+
+            try: params.append((k, unicode(kwargs[k]).encode('utf-8')))
+            except: params.append((k, kwargs[k]))
+
+        if is_live:
+            params.append((ROUTE_LIVE_TAG, ROUTE_LIVE_SUFFIX))
+
+        return 'plugin://{0}/?{1}'.format(addon_id, urlencode(params))
+
+    def url_for(func, is_live=False, **kwargs):
+        for url in router._routes:
+            if router._routes[url].__name__ == func.__name__:
+                return build_url(url, is_live, **kwargs)
+
+    return url_for
+
+def _build(url_for, plugin, count):
+    urls = []
+
+    for i in range(count):
+        id    = 'asset{:05d}'.format(i)
+        title = u'Round {}: Team A v Team \xc9'.format(i)
+
+        urls.append(url_for(plugin.alert, asset=id, title=title))
+        urls.append(url_for(plugin.play, id=id, is_live=True, play_type=1))
+        urls.append(url_for(plugin.play, id=id, is_live=True, start_from=900, play_type=2))
+        urls.append(url_for(plugin.play, id=id, is_live=bool(i % 2), start_from=900, play_type=0))
+
+    return urls
+
+def percentile(values, pct):
+    values = sorted(values)
+    index  = int(round(pct / 100.0 * (len(values) - 1)))
+    return values[index]
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark router.url_for')
+    parser.add_argument('-i', '--items', type=int, default=1000, help='videos in the panel')
+    parser.add_argument('-n', '--runs', type=int, default=50, help='runs per router')
+    args = parser.parse_args()
+
+    sys.path.insert(0, os.path.join(BENCH_DIR, 'stubs'))
+    sys.path.insert(0, ROOT_DIR)
+
+    from resources.lib import plugin
+    from resources.lib.matthuisman import router
+
+    routers = (('legacy', legacy(router)), ('current', router.url_for))
+
+    expected = _build(routers[0][1], plugin, args.items)
+    assert _build(routers[1][1], plugin, args.items) == expected
+
+    print('{:<8} {:>8} {:>8} {:>8}'.format('router', 'p50', 'p90', 'max'))
+
+    for name, url_for in routers:
+        results = []
+        for i in range(args.runs):
+            start = time.time()
+            _build(url_for, plugin, args.items)
+            results.append((time.time() - start) * 1000)
+
+        print('{:<8} {:>8.1f} {:>8.1f} {:>8.1f}'.format(name, percentile(results, 50), percentile(results, 90), max(results)))
+
+if __name__ == '__main__':
+    main()
@@ -1,34 +1,80 @@
+import threading
 from time import time
 
-from matthuisman import userdata, settings
-from matthuisman.session import Session
+from matthuisman import userdata, settings, cache
 from matthuisman.exceptions import Error
+from matthuisman.util import lazy_import
 
-from .constants import HEADERS, CLIENTID
+from .constants import HEADERS, CLIENTID, LIVE_EXPIRY, EVENT_EXPIRY, LANDING_EXPIRY, PANEL_EXPIRY, SHOW_EXPIRY, SPORT_MENU_EXPIRY, MAX_STALE, LIVE_MAX_STALE, STREAM_EXPIRY
 from .language import _
 
+_session_lock = threading.Lock()
+
 class APIError(Error):
     pass
 
+def _cache_key(func_name):
+    return lambda self, *args, **kwargs: cache.key_for(func_name, *args, **kwargs)
+
+#Play urls are only cached for users that asked for them to be resolved ahead of time
+#They are tokenized, so keyed per profile
+def _stream_cache_key(self, *args, **kwargs):
+    if not settings.getBool('prefetch_streams', False):
+        return None
+
+    return cache.key_for('stream', *args, profile=userdata.get('profile'), **kwargs)
+
+def _has_live(data):
+    rows = data if isinstance(data, list) else [data]
+
+    for row in rows:
+        for content in row.get('contents') or []:
+            if content.get('data', {}).get('asset', {}).get('isLive'):
+                return True
+
+    return False
+
+#rows containing live content expire quicker
+def _live_expiry(expires):
+    return lambda data: LIVE_EXPIRY if _has_live(data) else expires
+
+#and are only served stale for about as long, so live labels don't go out of date
+def _live_stale(max_stale):
+    return lambda data: LIVE_MAX_STALE if _has_live(data) else max_stale
+
 class API(object):
     def new_session(self):
         self.logged_in = False
 
-        self._session = Session(HEADERS)
+        self._session = None
         self._set_authentication()
         
         settings.setBool('_logged_in', self.logged_in)
 
+    #requests is only imported once a route makes its first request
+    #Locked as the first request can come from several pool threads at once
+    @property
+    def session(self):
+        with _session_lock:
+            if not self._session:
+                session = lazy_import('.matthuisman.session', __name__.rpartition('.')[0])
+                self._session = session.Session(HEADERS)
+                self._set_authentication()
+
+            return self._session
+
     def _set_authentication(self):
         access_token = userdata.get('access_token')
         if not access_token:
             return
 
-        self._session.headers.update({'authorization': 'Bearer {}'.format(access_token)})
+        if self._session:
+            self._session.headers.update({'authorization': 'Bearer {}'.format(access_token)})
+
         self.logged_in = True
 
     def _oauth_token(self, data):
-        token_data = self._session.post('https://auth.kayosports.com.au/oauth/token', json=data).json()
+        token_data = self.session.post('https://auth.kayosports.com.au/oauth/token', json=data).json()
         if 'error' in token_data:
             raise APIError(_(_.LOGIN_ERROR, msg=token_data.get('error_description')))
 
@@ -38,11 +84,13 @@ class API(object):
         if 'refresh_token' in token_data:
             userdata.set('refresh_token', token_data['refresh_token'])
 
+        #Other plugin calls need the new token now, not when the dispatch ends
+        userdata.flush()
         self._set_authentication()
 
-    def _refresh_token(self):
-        if userdata.get('expires', 0) > time():
-            return
+    def _refresh_token(self, within=0):
+        if userdata.get('expires', 0) - within > time():
+            return False
 
         payload = {
             "refresh_token": userdata.get('refresh_token'),
@@ -51,6 +99,14 @@ class API(object):
         }
 
         self._oauth_token(payload)
+        return True
+
+    #the service refreshes ahead of expiry, so play only refreshes as a fallback
+    def refresh_token(self, within=0):
+        if not self.logged_in or not userdata.get('refresh_token'):
+            return False
+
+        return self._refresh_token(within)
 
     def login(self, username, password):
         payload = {
@@ -67,12 +123,14 @@ class API(object):
 
     def profiles(self):
         self._refresh_token()
-        return self._session.get('https://profileapi.kayosports.com.au/user/profile').json()
+        return self.session.get('https://profileapi.kayosports.com.au/user/profile').json()
 
+    @cache.cached(SPORT_MENU_EXPIRY, key=_cache_key('sport_menu'), max_stale=MAX_STALE)
     def sport_menu(self):
-        return self._session.get('https://resources.kayosports.com.au/production/sport-menu/lists/default.json').json()
+        return self.session.get('https://resources.kayosports.com.au/production/sport-menu/lists/default.json').json()
 
     #landing has heros and panels
+    @cache.cached(_live_expiry(LANDING_EXPIRY), key=_cache_key('landing'), max_stale=_live_stale(MAX_STALE))
     def landing(self, name, **kwargs):
         params = {
             'evaluate': 99, 
@@ -83,9 +141,10 @@ class API(object):
 
         params.update(**kwargs)
 
-        return self._session.get('https://vccapi.kayosports.com.au/content/types/landing/names/{}'.format(name), params=params).json()
+        return self.session.get('https://vccapi.kayosports.com.au/content/types/landing/names/{}'.format(name), params=params).json()
 
     #panel has shows and episodes
+    @cache.cached(_live_expiry(PANEL_EXPIRY), key=_cache_key('panel'), max_stale=_live_stale(MAX_STALE))
     def panel(self, id, **kwargs):
         params = {
             'evaluate': 3, 
@@ -93,9 +152,10 @@ class API(object):
 
         params.update(**kwargs)
 
-        return self._session.get('https://vccapi.kayosports.com.au/content/types/carousel/keys/{}'.format(id), params=params).json()[0]
+        return self.session.get('https://vccapi.kayosports.com.au/content/types/carousel/keys/{}'.format(id), params=params).json()[0]
 
     #show has episodes and panels
+    @cache.cached(_live_expiry(SHOW_EXPIRY), key=_cache_key('show'), max_stale=_live_stale(MAX_STALE))
     def show(self, id, **kwargs):
         params = {
             'evaluate': 3,
@@ -104,8 +164,9 @@ class API(object):
 
         params.update(**kwargs)
 
-        return self._session.get('https://vccapi.kayosports.com.au/content/types/landing/names/show', params=params).json()
+        return self.session.get('https://vccapi.kayosports.com.au/content/types/landing/names/show', params=params).json()
 
+    @cache.cached(EVENT_EXPIRY, key=_cache_key('event'))
     def event(self, id, **kwargs):
         params = {
             'evaluate': 3,
@@ -114,8 +175,10 @@ class API(object):
 
         params.update(**kwargs)
 
-        return self._session.get('https://vccapi.kayosports.com.au/content/types/landing/names/event', params=params).json()[0]['contents'][0]['data']['asset']
+        return self.session.get('https://vccapi.kayosports.com.au/content/types/landing/names/event', params=params).json()[0]['contents'][0]['data']['asset']
 
+    #short lived so a stream resolved ahead of time can still be played
+    @cache.cached(STREAM_EXPIRY, key=_stream_cache_key)
     def stream(self, asset):
         self._refresh_token()
 
@@ -123,7 +186,7 @@ class API(object):
             'fields': 'alternativeStreams',
         }
 
-        data = self._session.post('https://vmndplay.kayosports.com.au/api/v1/asset/{}/play'.format(asset), params=params, json={}).json()
+        data = self.session.post('https://vmndplay.kayosports.com.au/api/v1/asset/{}/play'.format(asset), params=params, json={}).json()
         if 'errors' in data:
             raise APIError(_(_.ASSET_ERROR, msg=data['errors'][0]['detail']))
 
@@ -134,4 +197,6 @@ class API(object):
         userdata.delete('refresh_token')
         userdata.delete('expires')
         userdata.delete('profile')
+        #Cached rows (play urls included) belong to this account and keys are hashed, so clear them all
+        cache.empty()
         self.new_session()
\ No newline at end of file
@@ -8,7 +8,63 @@ CLIENTID   = 'qjmv9ZvaMDS9jGvHOxVfImLgQ3G5NrT2'
 
 CHANNELS_PANEL = 'yJbvNNbmxlD6'
 
-SERVICE_TIME = 270
+#API hosts the connection broker is allowed to forward to
+BROKER_HOSTS = (
+    'auth.kayosports.com.au',
+    'profileapi.kayosports.com.au',
+    'resources.kayosports.com.au',
+    'vccapi.kayosports.com.au',
+    'vmndplay.kayosports.com.au',
+)
+
+#Scheduled work wakes the service itself, this is only a coarse re-sync
+SERVICE_TIME = (60*30)
+
+WARM_TIME    = 270
+WARM_WITHIN  = WARM_TIME + 60
+WARM_DUE_KEY = 'warm'
+
+ALERT_HORIZON = 30 # Minutes
+ALERT_RESYNC  = (60*60*6)
+ALERT_RETRY   = 60
+ALERT_WORKERS = 4
+
+LIVE_EXPIRY       = 30
+EVENT_EXPIRY      = 60
+LANDING_EXPIRY    = (60*5)
+PANEL_EXPIRY      = (60*5)
+SHOW_EXPIRY       = (60*30)
+SPORT_MENU_EXPIRY = (60*60*24)
+MAX_STALE         = (60*10)
+LIVE_MAX_STALE    = LIVE_EXPIRY
+
+PREFETCH_WORKERS = 3
+
+PAGE_SIZE = 100
+
+STREAM_EXPIRY         = (60*3)
+STREAM_PREFETCH_LEAD  = 60
+STREAM_PREFETCH_MAX   = 3
+
+STREAM_FORMATS        = ['hls-ts', 'dash'] # Most preferred first
+STREAM_PROVIDER       = 'AKAMAI'
+STREAM_PROBE_INTERVAL = (60*30)
+STREAM_RACE_MAX       = 3
+STREAM_RACE_TIMEOUT   = (2, 2)
+STREAM_RACE_WAIT      = 5
+STREAM_WEIGHTS        = {
+    'format': 100,
+    'provider': 10,
+    'latency': 40,
+    'failures': 60,
+}
+
+TOKEN_REFRESH_WITHIN   = (60*10)
+TOKEN_REFRESH_JITTER   = (60*5)
+TOKEN_REFRESH_ATTEMPTS = 3
+TOKEN_REFRESH_BACKOFF  = 2
+TOKEN_REFRESH_RETRY    = (60*2)
+TOKEN_DUE_KEY          = 'token'
 
 FROM_CHOOSE = 0
 FROM_LIVE   = 1
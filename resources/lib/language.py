@@ -28,5 +28,17 @@ class Language(BaseLanguage):
     HLS_REQUIRED     = 30025
     CHOOSE           = 30026
     PLAY_FROM        = 30027
+    PREFETCH_PANELS  = 30028
+    WARM_CACHE       = 30029
+    ALERT_HORIZON    = 30030
+    PREFETCH_STREAMS = 30031
+    PROBE_STREAMS    = 30032
+    WEIGHT_FORMAT    = 30033
+    WEIGHT_PROVIDER  = 30034
+    WEIGHT_LATENCY   = 30035
+    WEIGHT_FAILURES  = 30036
+    RACE_STREAMS     = 30037
+    NEXT_PAGE        = 30038
+    PAGE_SIZE        = 30039
 
 _ = Language()
\ No newline at end of file
@@ -0,0 +1,60 @@
+from . import signals, userdata
+from .constants import ALERTS_USERDATA_KEY
+from .util import get_database
+
+_ids = []
+
+@signals.on(signals.BEFORE_DISPATCH)
+def reset():
+    del _ids[:]
+
+#Loaded once per dispatch so listings can check every item against a set
+def ids():
+    if not _ids:
+        _migrate()
+        Alert = get_database().Alert
+        _ids.append(set(row.asset for row in Alert.select(Alert.asset).where(Alert.notified == False)))
+
+    return _ids[0]
+
+def exists(asset):
+    return asset in ids()
+
+def add(asset, title=''):
+    get_database().Alert.set(asset=asset, title=title)
+    ids().add(asset)
+
+def remove(*assets):
+    Alert = get_database().Alert
+    Alert.delete_where(Alert.asset.in_(assets))
+    ids().difference_update(assets)
+
+def update(asset, **kwargs):
+    Alert = get_database().Alert
+    Alert.update(**kwargs).where(Alert.asset == asset).execute()
+
+def pending():
+    _migrate()
+    Alert = get_database().Alert
+    return list(Alert.select().where(Alert.notified == False))
+
+#Alerts we don't know the start of, that start before until or haven't been checked since checked_before
+def due(until, checked_before):
+    Alert = get_database().Alert
+    return list(Alert.select().where((Alert.notified == False) & (Alert.start.is_null() | (Alert.start <= until) | (Alert.checked <= checked_before))))
+
+def remove_notified():
+    Alert = get_database().Alert
+    Alert.delete_where(Alert.notified == True)
+
+def _migrate():
+    legacy = userdata.get(ALERTS_USERDATA_KEY)
+    if legacy is None:
+        return
+
+    database = get_database()
+    with database.db.atomic():
+        for asset in legacy:
+            database.Alert.set(asset=asset)
+
+    userdata.delete(ALERTS_USERDATA_KEY)
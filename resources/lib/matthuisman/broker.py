@@ -0,0 +1,103 @@
+import threading
+from urlparse import urlparse
+
+import xbmcgui
+
+from .constants import BROKER_HOST, BROKER_PROPERTY, BROKER_URL_HEADER, BROKER_VERIFY_HEADER, BROKER_ERROR_HEADER, SESSION_TIMEOUT
+from .log import log
+
+_window = xbmcgui.Window(10000)
+_server = []
+
+SKIP_REQUEST_HEADERS  = ('host', 'connection', 'content-length', 'accept-encoding', BROKER_URL_HEADER.lower(), BROKER_VERIFY_HEADER.lower())
+#Cookies would land in the client's jar under the broker's address and be sent on to every host
+SKIP_RESPONSE_HEADERS = ('connection', 'content-length', 'content-encoding', 'transfer-encoding', 'keep-alive', 'set-cookie')
+
+def url():
+    port = _window.getProperty(BROKER_PROPERTY)
+    if not port:
+        return None
+
+    return 'http://{}:{}/'.format(BROKER_HOST, port)
+
+#Only forwards to the given hosts, so it isn't an open proxy for other local processes
+def start(hosts):
+    if _server:
+        return
+
+    from BaseHTTPServer import HTTPServer, BaseHTTPRequestHandler
+    from SocketServer import ThreadingMixIn
+    from cookielib import DefaultCookiePolicy
+
+    import requests
+
+    #one pooled session for every plugin invocation, so connections (and TLS) stay warm
+    session = requests.Session()
+    session.cookies.set_policy(DefaultCookiePolicy(allowed_domains=[]))
+
+    class RequestHandler(BaseHTTPRequestHandler):
+        def log_message(self, format, *args):
+            pass
+
+        def _fail(self, code):
+            self.send_response(code)
+            self.send_header(BROKER_ERROR_HEADER, '1')
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+
+        def _forward(self):
+            url = self.headers.get(BROKER_URL_HEADER)
+            if not url or not url.startswith('https://'):
+                self._fail(400)
+                return
+
+            if urlparse(url).hostname not in hosts:
+                log.debug('Broker: {} is not an allowed host'.format(urlparse(url).hostname))
+                self._fail(403)
+                return
+
+            length  = int(self.headers.get('Content-Length') or 0)
+            body    = self.rfile.read(length) if length else None
+            verify  = self.headers.get(BROKER_VERIFY_HEADER) != 'false'
+            headers = dict((k, v) for k, v in self.headers.items() if k.lower() not in SKIP_REQUEST_HEADERS)
+
+            try:
+                resp = session.request(self.command, url, headers=headers, data=body, timeout=SESSION_TIMEOUT, verify=verify, allow_redirects=False)
+            except Exception as e:
+                log.debug('Broker: {} {} failed: {}'.format(self.command, url, e))
+                self._fail(502)
+                return
+
+            self.send_response(resp.status_code)
+            for key, value in resp.headers.items():
+                if key.lower() not in SKIP_RESPONSE_HEADERS:
+                    self.send_header(key, value)
+
+            self.send_header('Content-Length', str(len(resp.content)))
+            self.end_headers()
+
+            if self.command != 'HEAD':
+                self.wfile.write(resp.content)
+
+        do_GET = do_POST = do_PUT = do_DELETE = do_HEAD = _forward
+
+    class Server(ThreadingMixIn, HTTPServer):
+        daemon_threads = True
+
+    server = Server((BROKER_HOST, 0), RequestHandler)
+
+    thread = threading.Thread(target=server.serve_forever)
+    thread.daemon = True
+    thread.start()
+
+    _server.append(server)
+    _window.setProperty(BROKER_PROPERTY, str(server.server_address[1]))
+    log.debug('Broker: Listening on {}'.format(url()))
+
+def stop():
+    _window.clearProperty(BROKER_PROPERTY)
+
+    while _server:
+        server = _server.pop()
+        server.shutdown()
+        server.server_close()
@@ -1,23 +1,16 @@
+import threading
 from time import time
 from functools import wraps
 
-from . import peewee, database, settings, signals, gui, router
-from .constants import CACHE_TABLENAME, CACHE_EXPIRY, CACHE_CHECKSUM, CACHE_CLEAN_INTERVAL, CACHE_CLEAN_KEY, ROUTE_CLEAR_CACHE
-from .util import hash_6
+from . import settings, signals, gui, router, timings
+from .constants import CACHE_EXPIRY, CACHE_CLEAN_INTERVAL, CACHE_CLEAN_KEY, CACHE_MAX_ROWS, CACHE_TOUCH_INTERVAL, CACHE_MAX_STALE, CACHE_REVALIDATE_WORKERS, ROUTE_CLEAR_CACHE
+from .util import hash_6, get_database, Pool
 from .log import log
 from .language import _
 
 funcs   = []
-
-class Cache(database.Model):
-    checksum = CACHE_CHECKSUM
-
-    key     = database.HashField(unique=True)
-    value   = database.PickledField()
-    expires = peewee.IntegerField()
-
-    class Meta:
-        table_name = CACHE_TABLENAME
+revalidate = Pool(CACHE_REVALIDATE_WORKERS)
+_revalidating = []
 
 def enabled():
     return settings.getBool('use_cache', True)
@@ -47,59 +40,145 @@ def _build_key(func_name, *args, **kwargs):
     return hash_6(key)
 
 def cached(*args, **kwargs):
-    def decorator(f, expires=CACHE_EXPIRY, key=None):
+    def decorator(f, expires=CACHE_EXPIRY, key=None, max_stale=CACHE_MAX_STALE):
         @wraps(f)
         def decorated_function(*args, **kwargs):
+            skip_cache = kwargs.pop('_skip_cache', False)
+
             _key = key or _build_key(f.__name__, *args, **kwargs)
             if callable(_key):
                 _key = _key(*args, **kwargs)
 
-            if not kwargs.pop('_skip_cache', False):
-                value = get(_key)
-                if value != None:
-                    log('Cache Hit: {}'.format(_key))
-                    return value
+            if not _key:
+                return f(*args, **kwargs)
+
+            if not skip_cache:
+                row = _get_row(_key)
+                if row:
+                    if row.expires > time():
+                        log('Cache Hit: {}'.format(_key))
+                    else:
+                        log('Cache Stale: {}'.format(_key))
+                        _revalidate(_key, f, args, kwargs, expires, max_stale)
 
-            value = f(*args, **kwargs)
-            if value != None:
-                set(_key, value, expires)
+                    return row.value
 
-            return value
+            return _refresh(_key, f, args, kwargs, expires, max_stale)
 
         funcs.append(f.__name__)
         return decorated_function
 
     return lambda f: decorator(f, *args, **kwargs)
 
-def get(key, default=None):
+@timings.timer('cache.get')
+def _get_row(key):
     if not enabled():
-        return default
+        return None
+
+    Cache = get_database().Cache
+    now   = int(time())
 
     try:
-        return Cache.get(Cache.key == key, Cache.expires > time()).value
+        row = Cache.get(Cache.key == key, (Cache.expires > now) | (Cache.stale > now))
     except Cache.DoesNotExist:
+        return None
+
+    #Only record access every so often so reads don't turn into writes
+    if row.accessed < now - CACHE_TOUCH_INTERVAL:
+        Cache.update(accessed=now).where(Cache.id == row.id).execute()
+
+    return row
+
+def _refresh(key, f, args, kwargs, expires, max_stale):
+    value = f(*args, **kwargs)
+    if value != None:
+        set(key, value, expires(value) if callable(expires) else expires, max_stale(value) if callable(max_stale) else max_stale)
+
+    return value
+
+def _revalidate(key, f, args, kwargs, expires, max_stale):
+    if key in _revalidating:
+        return
+
+    _revalidating.append(key)
+
+    #Already off the main thread (eg. a prefetch worker) so just refresh inline
+    if threading.current_thread().name != 'MainThread':
+        _refresh(key, f, args, kwargs, expires, max_stale)
+        return
+
+    def task():
+        try:
+            _refresh(key, f, args, kwargs, expires, max_stale)
+            log('Cache Revalidated: {}'.format(key))
+        finally:
+            get_database().close()
+
+    revalidate.add(task)
+    revalidate.start()
+
+@signals.on(signals.AFTER_DISPATCH)
+def wait_revalidate():
+    revalidate.join()
+    del _revalidating[:]
+
+def remaining(key, stale=False):
+    row = _get_row(key)
+    if not row:
+        return 0
+
+    return max(0, (row.stale if stale else row.expires) - int(time()))
+
+def get(key, default=None):
+    row = _get_row(key)
+    if not row or row.expires <= time():
         return default
 
-def set(key, value, expires=CACHE_EXPIRY):
-    expires = int(time() + expires)
-    Cache.set(key=key, value=value, expires=expires)
+    return row.value
+
+@timings.timer('cache.set')
+def set(key, value, expires=CACHE_EXPIRY, max_stale=CACHE_MAX_STALE):
+    now     = int(time())
+    expires = now + int(expires)
+    get_database().Cache.set(key=key, value=value, expires=expires, stale=expires + max_stale, accessed=now)
 
 def delete(key):
+    Cache = get_database().Cache
     return Cache.delete_where(Cache.key == key)
 
 def empty():
-    deleted = Cache.truncate()
+    deleted = get_database().Cache.truncate()
     log('Cache: Deleted {} Rows'.format(deleted))
 
-@signals.on(signals.BEFORE_DISPATCH)
 def remove_expired():
-    deleted = Cache.delete_where(Cache.expires < int(time()))
-    log('Cache: Deleted {} Expired Rows'.format(deleted))
+    Cache   = get_database().Cache
+    expired = Cache.delete_where(Cache.stale < int(time()))
+
+    lru   = 0
+    count = Cache.select().count()
+    if count > CACHE_MAX_ROWS:
+        oldest = Cache.select(Cache.id).order_by(Cache.accessed).limit(count - CACHE_MAX_ROWS)
+        lru    = Cache.delete_where(Cache.id.in_(oldest))
+
+    log('Cache: Deleted {} Expired Rows, {} LRU Rows. {} Rows Remaining'.format(expired, lru, count - lru))
+
+@signals.on(signals.ON_SERVICE)
+def clean():
+    KeyStore = get_database().KeyStore
+
+    try:
+        last_clean = int(KeyStore.get(KeyStore.key == CACHE_CLEAN_KEY).value)
+    except KeyStore.DoesNotExist:
+        last_clean = 0
+
+    if time() - last_clean < CACHE_CLEAN_INTERVAL:
+        return
+
+    remove_expired()
+    KeyStore.set(key=CACHE_CLEAN_KEY, value=int(time()))
 
 @router.route(ROUTE_CLEAR_CACHE)
 def clear_cache(key, **kwargs):
     delete_count = delete(key)
     msg = _(_.PLUGIN_CACHE_REMOVED, delete_count=delete_count)
-    gui.notification(msg)
-
-database.tables.append(Cache)
\ No newline at end of file
+    gui.notification(msg)
\ No newline at end of file
@@ -24,7 +24,8 @@ DB_PRAGMAS      = {
     'ignore_check_constraints': 0,
     'synchronous': 0
 }
-DB_TABLENAME = '_db'
+DB_TABLENAME    = '_db'
+DB_STAMP_PATH   = os.path.join(ADDON_PROFILE, 'data.db.stamp')
 ###################
 
 ##### USERDATA ####
@@ -32,11 +33,16 @@ USERDATA_KEY = '_userdata'
 ###############
 
 ##### CACHE #####
-CACHE_TABLENAME      = '_cache'
-CACHE_CHECKSUM       = ADDON_VERSION # Recreates cache when new addon version
-CACHE_EXPIRY         = (60*60*24) # 24 Hours
-CACHE_CLEAN_INTERVAL = (60*60*4)  # 4 Hours
-CACHE_CLEAN_KEY      = '_cache_cleaned'
+CACHE_TABLENAME          = '_cache'
+CACHE_CHECKSUM           = ADDON_VERSION # Recreates cache when new addon version
+CACHE_EXPIRY             = (60*60*24) # 24 Hours
+CACHE_CLEAN_INTERVAL     = (60*60*4)  # 4 Hours
+CACHE_CLEAN_KEY          = '_cache_cleaned'
+CACHE_MAX_ROWS           = 1000
+CACHE_TOUCH_INTERVAL     = (60*10)  # 10 Minutes
+CACHE_MAX_STALE          = 0 # Never serve expired rows
+CACHE_REVALIDATE_WORKERS = 2
+MEM_CACHE_MAX_ROWS       = 100
 #################
 
 #### ROUTING ####
@@ -48,6 +54,7 @@ ROUTE_IA_INSTALL       = '_ia_install'
 ROUTE_CLEAR_CACHE      = '_clear_cache'
 ROUTE_SERVICE          = '_service'
 ROUTE_SERVICE_INTERVAL = (60*5)
+ROUTE_SERVICE_POLL     = 30
 ROUTE_LIVE_TAG         = '_l'
 ROUTE_LIVE_SUFFIX      = '.pvr'
 ROUTE_URL_TAG          = '_url'
@@ -76,5 +83,34 @@ SESSION_ATTEMPTS = 2
 SESSION_CHUNKSIZE = 4096
 #################
 
+#### BROKER ####
+BROKER_HOST          = '127.0.0.1'
+BROKER_PROPERTY      = '{}.broker'.format(ADDON_ID)
+BROKER_URL_HEADER    = 'X-Broker-Url'
+BROKER_VERIFY_HEADER = 'X-Broker-Verify'
+BROKER_ERROR_HEADER  = 'X-Broker-Error'
+#################
+
+#### SCHEDULE ####
+SCHEDULE_TABLENAME = '_schedule'
+SCHEDULE_PROPERTY  = '{}.schedule'.format(ADDON_ID)
+#################
+
+#### ALERTS ####
+ALERTS_TABLENAME    = '_alerts'
+ALERTS_USERDATA_KEY = 'alerts' # Where reminders used to be kept
+#################
+
+#### PROBE ####
+PROBE_TABLENAME = '_probe'
+PROBE_TIMEOUT   = (2, 3)
+PROBE_ALPHA     = 0.3 # Weight of the newest sample
+#################
+
+#### TIMINGS ####
+TIMINGS_FILE     = os.path.join(ADDON_PROFILE, 'timings.json')
+TIMINGS_MAX_ROWS = 100
+#################
+
 #### GUI ####
 GUI_DEFAULT_AUTOCLOSE = 120000 #2mins
\ No newline at end of file
@@ -1,4 +1,5 @@
 import os
+import threading
 
 try:
     import cPickle as pickle
@@ -6,14 +7,33 @@ except:
     import pickle
 
 from . import peewee, userdata, signals
-from .constants import DB_PATH, DB_PRAGMAS, DB_MAX_INSERTS, DB_TABLENAME, ADDON_DEV
-from .util import hash_6
+from .constants import DB_PATH, DB_PRAGMAS, DB_MAX_INSERTS, DB_TABLENAME, DB_STAMP_PATH, SCHEDULE_TABLENAME, ALERTS_TABLENAME, PROBE_TABLENAME, CACHE_TABLENAME, CACHE_CHECKSUM, ADDON_DEV, ADDON_VERSION
+from .util import hash_6, remove_file
+from .log import log
 
-path = os.path.dirname(DB_PATH)
-if not os.path.exists(path):
-    os.makedirs(path)
+_check_lock = threading.Lock()
+_checked    = []
 
-db = peewee.SqliteDatabase(DB_PATH, pragmas=DB_PRAGMAS)
+class Database(peewee.SqliteDatabase):
+    #Connections are opened on first query, so routes that never touch the db don't pay for it
+    def connect(self, *args, **kwargs):
+        path = os.path.dirname(self.database)
+        if not os.path.exists(path):
+            os.makedirs(path)
+
+        if not os.path.exists(self.database):
+            remove_file(DB_STAMP_PATH)
+
+        opened = super(Database, self).connect(*args, **kwargs)
+        if opened and not _checked:
+            with _check_lock:
+                if not _checked:
+                    check_tables()
+                    _checked.append(True)
+
+        return opened
+
+db = Database(DB_PATH, pragmas=DB_PRAGMAS)
 
 if ADDON_DEV:
     import logging
@@ -104,8 +124,58 @@ class KeyStore(Model):
     class Meta:
         table_name = DB_TABLENAME
 
-tables = [KeyStore]
+class Cache(Model):
+    checksum = CACHE_CHECKSUM
+
+    key      = HashField(unique=True)
+    value    = PickledField()
+    expires  = peewee.IntegerField(index=True)
+    stale    = peewee.IntegerField(default=0, index=True)
+    accessed = peewee.IntegerField(default=0, index=True)
+
+    class Meta:
+        table_name = CACHE_TABLENAME
+
+class Schedule(Model):
+    key = peewee.TextField(primary_key=True)
+    due = peewee.IntegerField(index=True)
+
+    class Meta:
+        table_name = SCHEDULE_TABLENAME
+
+class Alert(Model):
+    asset    = peewee.TextField(primary_key=True)
+    title    = peewee.TextField(default='')
+    start    = peewee.IntegerField(null=True, index=True)
+    checked  = peewee.IntegerField(default=0, index=True)
+    notified = peewee.BooleanField(default=False, index=True)
+
+    class Meta:
+        table_name = ALERTS_TABLENAME
+
+class Probe(Model):
+    key      = peewee.TextField(primary_key=True)
+    latency  = peewee.FloatField(default=0)
+    failures = peewee.FloatField(default=0)
+    samples  = peewee.IntegerField(default=0)
+    updated  = peewee.IntegerField(default=0)
+
+    class Meta:
+        table_name = PROBE_TABLENAME
+
+tables = [KeyStore, Cache, Schedule, Alert, Probe]
+
+def _stamp():
+    return hash_6([ADDON_VERSION, [table.table_name() for table in tables]])
+
 def check_tables():
+    stamp = _stamp()
+
+    if not ADDON_DEV and os.path.exists(DB_STAMP_PATH):
+        with open(DB_STAMP_PATH) as f:
+            if f.read() == stamp:
+                return
+
     with db.atomic():
         for table in tables:
             key      = table.table_name()
@@ -118,18 +188,19 @@ def check_tables():
             db.create_tables([table])
 
             KeyStore.set(key=key, value=checksum)
+            log('Database: Created table {}'.format(key))
+
+    with open(DB_STAMP_PATH, 'w') as f:
+        f.write(stamp)
 
 @signals.on(signals.AFTER_RESET)
 def delete():
     close()
-    if os.path.exists(DB_PATH):
-        os.remove(DB_PATH)
+    del _checked[:]
+
+    remove_file(DB_PATH)
+    remove_file(DB_STAMP_PATH)
 
 @signals.on(signals.ON_CLOSE)
 def close():
-    db.close()
-
-@signals.on(signals.BEFORE_DISPATCH)
-def connect():
-    db.connect(reuse_if_open=True)
-    check_tables()
\ No newline at end of file
+    db.close()
\ No newline at end of file
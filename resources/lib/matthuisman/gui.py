@@ -19,6 +19,10 @@ def notification(message, heading=None, icon=None, time=3000, sound=False):
     xbmcgui.Dialog().notification(heading, message, icon, time, sound)
 
 def refresh():
+    #the refreshed listing is a new plugin call, so it needs to see our changes
+    from . import userdata
+    userdata.flush()
+
     xbmc.executebuiltin('Container.Refresh')
 
 def select(heading=None, options=None, **kwargs):
@@ -90,7 +94,40 @@ def yes_no(message, heading=None, autoclose=GUI_DEFAULT_AUTOCLOSE, **kwargs):
 
     return xbmcgui.Dialog().yesno(heading, *lines, **kwargs)
 
+#Collections are only created when first used, so large folders don't allocate seven per item
+class _Lazy(object):
+    def __init__(self, slot, factory=dict):
+        self._slot    = slot
+        self._factory = factory
+
+    def __get__(self, obj, cls=None):
+        if obj is None:
+            return self
+
+        value = getattr(obj, self._slot)
+        if value is None:
+            value = self._factory()
+            setattr(obj, self._slot, value)
+
+        return value
+
+    def __set__(self, obj, value):
+        setattr(obj, self._slot, value)
+
 class Item(object):
+    __slots__ = ('id', 'label', 'path', 'playable', 'inputstream', '_is_folder', '_info', '_context', 
+        '_headers', '_cookies', '_properties', '_art', '_video', '_audio', '_subtitles')
+
+    info       = _Lazy('_info')
+    context    = _Lazy('_context', list)
+    headers    = _Lazy('_headers')
+    cookies    = _Lazy('_cookies')
+    properties = _Lazy('_properties')
+    art        = _Lazy('_art')
+    video      = _Lazy('_video')
+    audio      = _Lazy('_audio')
+    subtitles  = _Lazy('_subtitles', list)
+
     def __init__(self, id=None, label='', path=None, playable=False, info=None, context=None, 
             headers=None, cookies=None, properties=None, is_folder=None, art=None, inputstream=None,
             video=None, audio=None, subtitles=None):
@@ -98,18 +135,18 @@ class Item(object):
         self.id          = id
         self.label       = label
         self.path        = path
-        self.info        = info or {}
         self.playable    = playable
-        self.context     = context or []
-        self.headers     = headers or {}
-        self.cookies     = cookies or {}
-        self.properties  = properties or {}
-        self.art         = art or {}
-        self.video       = video or {}
-        self.audio       = audio or {}
-        self.subtitles   = subtitles or []
         self.inputstream = inputstream
         self._is_folder  = is_folder
+        self._info       = info or None
+        self._context    = context or None
+        self._headers    = headers or None
+        self._cookies    = cookies or None
+        self._properties = properties or None
+        self._art        = art or None
+        self._video      = video or None
+        self._audio      = audio or None
+        self._subtitles  = subtitles or None
 
     @property
     def is_folder(self): 
@@ -122,17 +159,18 @@ class Item(object):
     def get_url_headers(self):
         string = ''
         
-        for key in self.headers:
-            string += '{0}={1}&'.format(key, quote(self.headers[key]))
+        for key in self._headers or {}:
+            string += '{0}={1}&'.format(key, quote(self._headers[key]))
 
-        if self.cookies:
+        if self._cookies:
             string += 'Cookie='
-            for key in self.cookies:
-                string += '{0}%3D{1}; '.format(key, quote(self.cookies[key]))
+            for key in self._cookies:
+                string += '{0}%3D{1}; '.format(key, quote(self._cookies[key]))
 
         return string.strip('&')
 
-    def get_li(self):
+    #default_art and headers let a folder work these out once for all of its items
+    def get_li(self, default_art=None, headers=None):
         try:
             #KODI 18+
             li = xbmcgui.ListItem(offscreen=True)
@@ -141,43 +179,53 @@ class Item(object):
 
         if self.label:
             li.setLabel(self.label)
-            if not self.info.get('plot'):
-                self.info['plot'] = self.label
+            info = self.info
+            if not info.get('plot'):
+                info['plot'] = self.label
                 
-            if not self.info.get('title'):
-                self.info['title'] = self.label
+            if not info.get('title'):
+                info['title'] = self.label
 
         if self.path:
             li.setPath(self.path)
 
-        if self.info:
-            li.setInfo('video', self.info)
+        if self._info:
+            li.setInfo('video', self._info)
+
+        if self._video:
+            li.addStreamInfo('video', self._video)
 
-        if self.video:
-            li.addStreamInfo('video', self.video)
+        if self._audio:
+            li.addStreamInfo('audio', self._audio)
 
-        if self.audio:
-            li.addStreamInfo('audio', self.audio)
+        art = self._art
+        if default_art:
+            if not art:
+                art = default_art
+            else:
+                art['thumb']  = art.get('thumb') or default_art.get('thumb')
+                art['fanart'] = art.get('fanart') or default_art.get('fanart')
 
-        if self.art:
-            if 'poster' not in self.art:
-                self.art['poster'] = self.art.get('thumb')
+        if art:
+            if 'poster' not in art:
+                art['poster'] = art.get('thumb')
 
-            li.setArt(self.art)
+            li.setArt(art)
 
         if self.playable:
             li.setProperty('IsPlayable', 'true')
 
-        if self.context:
-            li.addContextMenuItems(self.context)
+        if self._context:
+            li.addContextMenuItems(self._context)
 
-        if self.subtitles:
-            li.setSubtitles(self.subtitles)
+        if self._subtitles:
+            li.setSubtitles(self._subtitles)
 
-        for key in self.properties:
-            li.setProperty(key, str(self.properties[key]))
+        for key in self._properties or {}:
+            li.setProperty(key, str(self._properties[key]))
 
-        headers = self.get_url_headers()
+        if headers is None:
+            headers = self.get_url_headers()
 
         if self.inputstream and self.inputstream.check():
             li.setProperty('inputstreamaddon', 'inputstream.adaptive')
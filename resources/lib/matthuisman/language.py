@@ -71,6 +71,8 @@ class BaseLanguage(object):
     IA_OVERRIDE                 = 32038
     SERVICE_DELAY               = 32039
     MD5_MISMATCH                = 32040
+    SAVE_TIMINGS                = 32041
+    USE_BROKER                  = 32042
 
     def __getattribute__(self, name):
         attr = object.__getattribute__(self, name)
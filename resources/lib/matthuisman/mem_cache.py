@@ -7,45 +7,82 @@ import xbmcgui
 
 from .log import log
 from .util import hash_6
-from .constants import ADDON_ID, CACHE_EXPIRY, ROUTE_CLEAR_CACHE
+from .constants import ADDON_ID, CACHE_EXPIRY, MEM_CACHE_MAX_ROWS, ROUTE_CLEAR_CACHE
 from . import signals, gui, router, settings
 
 cache_key = 'cache.'+ADDON_ID
 _window   = xbmcgui.Window(10000)
 
+#Each key is persisted in its own window property and only decoded when it's asked for
+#The index property holds every key's [expires, accessed] and is all that's loaded up front
 class Cache(object):
-    data = {}
+    data    = {}
+    index   = None
+    dirty   = {}
+    deleted = {}
 
 cache = Cache()
 
+def _property(key):
+    return '{}.{}'.format(cache_key, key)
+
 @signals.on(signals.BEFORE_DISPATCH)
 def load():
-    if not cache.data and settings.getBool('persist_cache', True):
-        cache.data = json.loads(_window.getProperty(cache_key) or "{}")
-        _window.setProperty(cache_key, "{}")
+    if cache.index is None and settings.getBool('persist_cache', True):
+        try:
+            cache.index = json.loads(_window.getProperty(cache_key) or '{}')
+        except ValueError:
+            cache.index = {}
+
+def _read(key):
+    try:
+        value = json.loads(_window.getProperty(_property(key)))
+    except ValueError:
+        cache.index.pop(key, None)
+        return None
+
+    row = cache.data[key] = [value, cache.index[key][0]]
+    return row
 
 def set(key, value, expires=CACHE_EXPIRY):
     expires = int(time() + expires)
     cache.data[key] = [value, expires]
+    cache.dirty[key] = True
+    cache.deleted.pop(key, None)
+
+    if cache.index is not None:
+        cache.index[key] = [expires, int(time())]
     
 def get(key, default=None):
-    try:
-        row = cache.data[key]
-    except KeyError:
+    row = cache.data.get(key)
+    if row is None and cache.index and key in cache.index:
+        row = _read(key)
+
+    if row is None:
         return default
 
     if row[1] < time():
-        cache.data.pop(key, None)
+        delete(key)
         return default
-    else:
-        return row[0]
+
+    if cache.index and key in cache.index:
+        cache.index[key][1] = int(time())
+
+    return row[0]
 
 def delete(key):
-    return int(cache.data.pop(key, None) != None)
+    deleted = cache.data.pop(key, None) != None
+
+    if cache.index and cache.index.pop(key, None) != None:
+        cache.deleted[key] = True
+        deleted = True
+
+    cache.dirty.pop(key, None)
+    return int(deleted)
 
 def empty():
-    deleted = len(cache.data)
-    cache.data.clear()
+    keys = list(cache.data) + list(cache.index or [])
+    deleted = sum(delete(key) for key in keys)
     log('Mem Cache: Deleted {} Rows'.format(deleted))
 
 def key_for(f, *args, **kwargs):
@@ -103,22 +140,46 @@ def cached(*args, **kwargs):
 
 @signals.on(signals.AFTER_DISPATCH)
 def remove_expired():
-    _time = time()
-    delete  = []
+    _time = int(time())
+    delete_keys = [key for key in cache.data if cache.data[key][1] < _time]
+
+    if cache.index:
+        delete_keys.extend(key for key in cache.index if cache.index[key][0] < _time)
+
+    for key in delete_keys:
+        delete(key)
+
+    if delete_keys:
+        log('Mem Cache: Deleted {} Expired Rows'.format(len(delete_keys)))
 
-    for key in cache.data.keys():
-        if cache.data[key][1] < _time:
-            delete.append(key)
+    if cache.index is None:
+        return
 
-    for key in delete:
-        cache.data.pop(key, None)
+    #Least recently used keys go first once there are too many
+    if len(cache.index) > MEM_CACHE_MAX_ROWS:
+        lru = sorted(cache.index, key=lambda key: cache.index[key][1])[:len(cache.index) - MEM_CACHE_MAX_ROWS]
+        for key in lru:
+            delete(key)
 
-    if delete:
-        log('Mem Cache: Deleted {} Expired Rows'.format(len(delete)))
+        log('Mem Cache: Deleted {} LRU Rows'.format(len(lru)))
 
-    if settings.getBool('persist_cache', True):
-        _window.setProperty(cache_key, json.dumps(cache.data))
-        cache.data.clear()
+    save()
+
+#Only keys that changed this dispatch are written
+def save():
+    for key in cache.deleted:
+        _window.clearProperty(_property(key))
+
+    for key in cache.dirty:
+        if key in cache.index:
+            _window.setProperty(_property(key), json.dumps(cache.data[key][0]))
+
+    _window.setProperty(cache_key, json.dumps(cache.index))
+
+    cache.data.clear()
+    cache.dirty.clear()
+    cache.deleted.clear()
+    cache.index = None
 
 @router.route(ROUTE_CLEAR_CACHE)
 def clear_cache(key, **kwargs):
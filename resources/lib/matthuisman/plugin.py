@@ -4,11 +4,12 @@ from functools import wraps
 
 import xbmc, xbmcplugin
 
-from . import router, gui, settings, userdata, inputstream, signals
+from . import router, gui, settings, userdata, inputstream, signals, timings
 from .constants import ROUTE_SETTINGS, ROUTE_RESET, ROUTE_SERVICE, ROUTE_CLEAR_CACHE, ROUTE_IA_SETTINGS, ROUTE_IA_INSTALL, ADDON_ICON, ADDON_FANART, ADDON_ID
 from .log import log
 from .language import _
 from .exceptions import PluginError
+from .util import get_database
 
 ## SHORTCUTS
 url_for         = router.url_for
@@ -110,6 +111,9 @@ def _reset(**kwargs):
     if not gui.yes_no(_.PLUGIN_RESET_YES_NO):
         return
 
+    #make sure the database has registered its reset handler
+    get_database()
+
     userdata.clear()
     gui.notification(_.PLUGIN_RESET_OK)
     signals.emit(signals.AFTER_RESET)
@@ -130,16 +134,18 @@ def _handle():
 
 #Plugin.Item()
 class Item(gui.Item):
+    __slots__ = ('cache_key',)
+
     def __init__(self, cache_key=None, *args, **kwargs):
         super(Item, self).__init__(self, *args, **kwargs)
         self.cache_key = cache_key
 
-    def get_li(self):
+    def get_li(self, *args, **kwargs):
         if settings.getBool('use_cache', True) and self.cache_key:
             url = url_for(ROUTE_CLEAR_CACHE, key=self.cache_key)
             self.context.append((_.PLUGIN_CONTEXT_CLEAR_CACHE, 'XBMC.RunPlugin({})'.format(url)))
 
-        return super(Item, self).get_li()
+        return super(Item, self).get_li(*args, **kwargs)
 
     def play(self):
         li = self.get_li()
@@ -152,7 +158,7 @@ class Item(gui.Item):
 
 #Plugin.Folder()
 class Folder(object):
-    def __init__(self, items=None, title=None, content='videos', updateListing=False, cacheToDisc=True, sort_methods=None, thunb=None, fanart=None):
+    def __init__(self, items=None, title=None, content='videos', updateListing=False, cacheToDisc=True, sort_methods=None, thunb=None, fanart=None, batch=True):
         self.items = items or []
         self.title = title
         self.content = content
@@ -161,19 +167,35 @@ class Folder(object):
         self.sort_methods = sort_methods or [xbmcplugin.SORT_METHOD_UNSORTED, xbmcplugin.SORT_METHOD_LABEL, xbmcplugin.SORT_METHOD_DATEADDED]
         self.thunb = thunb or ADDON_ICON
         self.fanart = fanart or ADDON_FANART
+        self.batch = batch
 
+    @timings.timer('display')
     def display(self):
         handle = _handle()
 
+        #Worked out once here instead of for every item
+        default_art = {'thumb': self.thunb, 'fanart': self.fanart, 'poster': self.thunb}
+        headers = {}
+
+        items = []
         for item in self.items:
             if not item:
                 continue
 
-            item.art['thumb'] = item.art.get('thumb') or self.thunb
-            item.art['fanart'] = item.art.get('fanart') or self.fanart
+            key = (id(item._headers), id(item._cookies))
+            if key not in headers:
+                headers[key] = item.get_url_headers()
+
+            li = item.get_li(default_art=default_art, headers=headers[key])
+
+            if self.batch:
+                items.append((li.getPath(), li, item.is_folder))
+            else:
+                xbmcplugin.addDirectoryItem(handle, li.getPath(), li, item.is_folder, len(self.items))
 
-            li = item.get_li()
-            xbmcplugin.addDirectoryItem(handle, li.getPath(), li, item.is_folder)
+        #One call across to Kodi for the whole folder
+        if items:
+            xbmcplugin.addDirectoryItems(handle, items, len(items))
 
         if self.content: xbmcplugin.setContent(handle, self.content)
         if self.title: xbmcplugin.setPluginCategory(handle, self.title)
@@ -0,0 +1,78 @@
+from time import time
+from Queue import Queue, Empty
+
+from .constants import PROBE_TIMEOUT, PROBE_ALPHA
+from .util import get_database, close_database
+from .log import log
+
+#Latency and failure rate are moving averages, so recent samples count the most
+def record(key, latency=None):
+    Probe = get_database().Probe
+
+    try:
+        row = Probe.get(Probe.key == key)
+    except Probe.DoesNotExist:
+        row = Probe(key=key)
+
+    failed = 0.0 if latency else 1.0
+    row.failures = failed if not row.samples else _average(row.failures, failed)
+
+    #latency only averages successful probes, 0 means none yet
+    if latency:
+        row.latency = latency if not row.latency else _average(row.latency, latency)
+
+    Probe.set(key=key, latency=row.latency, failures=row.failures, samples=row.samples + 1, updated=int(time()))
+
+def _average(current, sample):
+    return current + PROBE_ALPHA * (sample - current)
+
+def stats(keys):
+    Probe = get_database().Probe
+    return dict((row.key, row) for row in Probe.select().where(Probe.key.in_(list(keys))))
+
+def probe(session, url, key=None, timeout=PROBE_TIMEOUT, **kwargs):
+    start = time()
+
+    try:
+        resp = session.get(url, timeout=timeout, attempts=1, **kwargs)
+        resp.raise_for_status()
+    except Exception as e:
+        log.debug('Probe Failed: {} ({})'.format(url, e))
+        latency = None
+    else:
+        latency = time() - start
+        log.debug('Probe: {} ({:.0f}ms)'.format(url, latency*1000))
+
+    if key:
+        record(key, latency)
+
+    return latency
+
+#Probes every (key, url) on the pool and returns the index of the first to respond ok
+#The rest keep running on the pool so their results are still recorded
+def first(session, candidates, pool, timeout=PROBE_TIMEOUT, wait=None):
+    results = Queue()
+
+    def task(index, key, url):
+        latency = None
+        try:
+            latency = probe(session, url, key=key, timeout=timeout)
+        finally:
+            results.put((index, latency))
+            close_database()
+
+    for index, (key, url) in enumerate(candidates):
+        pool.add(task, index, key, url)
+
+    pool.start()
+
+    for i in range(len(candidates)):
+        try:
+            index, latency = results.get(timeout=wait)
+        except Empty:
+            break
+
+        if latency:
+            return index
+
+    return None
@@ -1,19 +1,28 @@
 from urlparse import parse_qsl
-from urllib import urlencode
+from urllib import urlencode, quote_plus
 
-from . import signals
+from . import signals, settings, timings, userdata
 from .constants import ROUTE_TAG, ADDON_ID, ROUTE_LIVE_TAG, ROUTE_LIVE_SUFFIX, ROUTE_URL_TAG
 from .log import log
 from .language import _
 from .exceptions import RouterError
 
-_routes = {}
+_routes   = {}
+_names    = {}
+_prefixes = {}
 
 # @router.add('_settings', settings)
 def add(url, f):
     if url == None:
         url = f.__name__
+
+    #url_for looks routes up by function name, so keep a reverse index
+    old = _routes.get(url)
+    if old and _names.get(old.__name__) == url:
+        del _names[old.__name__]
+
     _routes[url] = f
+    _names[f.__name__] = url
 
 # @router.route('_settings')
 def route(url):
@@ -43,11 +52,12 @@ def parse_url(url):
     return function, params
 
 def url_for_func(func, is_live=False, **kwargs):
-    for url in _routes:
-        if _routes[url].__name__ == func.__name__:
-            return build_url(url, is_live, **kwargs)
+    try:
+        url = _names[func.__name__]
+    except KeyError:
+        raise RouterError(_(_.ROUTER_NO_URL, function_name=func.__name__))
 
-    raise RouterError(_(_.ROUTER_NO_URL, function_name=func.__name__))
+    return build_url(url, is_live, **kwargs)
 
 def url_for(func_or_url, is_live=False, **kwargs):
     if callable(func_or_url):
@@ -55,27 +65,57 @@ def url_for(func_or_url, is_live=False, **kwargs):
     else:
         return build_url(func_or_url, is_live, **kwargs)
 
+def _prefix(url, addon_id):
+    key = (url, addon_id)
+    if key not in _prefixes:
+        _prefixes[key] = 'plugin://{0}/?{1}={2}'.format(addon_id, ROUTE_TAG, quote_plus(url))
+
+    return _prefixes[key]
+
+def _encode(value):
+    if isinstance(value, str):
+        return value
+    elif isinstance(value, unicode):
+        return value.encode('utf-8')
+
+    try: return unicode(value).encode('utf-8')
+    except: return value
+
 def build_url(url, is_live=False, addon_id=ADDON_ID, **kwargs):
-    kwargs[ROUTE_TAG] = url
+    keys = sorted(k for k in kwargs if kwargs[k] != None)
+
+    #Keys sorting before the route tag would need it in the middle, so build those the long way
+    if keys and keys[0] <= ROUTE_TAG:
+        kwargs[ROUTE_TAG] = url
+        params = [(k, _encode(kwargs[k])) for k in sorted(kwargs) if kwargs[k] != None]
+        if is_live:
+            params.append((ROUTE_LIVE_TAG, ROUTE_LIVE_SUFFIX))
 
-    params = []
-    for k in sorted(kwargs):
-        if kwargs[k] == None:
-            continue
+        return 'plugin://{0}/?{1}'.format(addon_id, urlencode(params))
 
-        try: params.append((k, unicode(kwargs[k]).encode('utf-8')))
-        except: params.append((k, kwargs[k]))
+    #Same output as urlencode, without its per pair type checks
+    params = [_prefix(url, addon_id)]
+    for k in keys:
+        params.append(quote_plus(k) + '=' + quote_plus(str(_encode(kwargs[k]))))
 
     if is_live:
-        params.append((ROUTE_LIVE_TAG, ROUTE_LIVE_SUFFIX))
+        params.append(ROUTE_LIVE_TAG + '=' + quote_plus(ROUTE_LIVE_SUFFIX))
 
-    return 'plugin://{0}/?{1}'.format(addon_id, urlencode(params))
+    return '&'.join(params)
 
 # router.dispatch('?_=_settings')
 def dispatch(url):
-    with signals.throwable():
-        signals.emit(signals.BEFORE_DISPATCH)
-        function, params = parse_url(url)
-        function(**params)
+    timings.reset()
+
+    #userdata is written once, after everything (including background work) is done
+    with userdata.batch():
+        with signals.throwable():
+            signals.emit(signals.BEFORE_DISPATCH)
+            function, params = parse_url(url)
+
+            with timings.timed('route.{}'.format(function.__name__)):
+                function(**params)
+
+        signals.emit(signals.AFTER_DISPATCH)
 
-    signals.emit(signals.AFTER_DISPATCH)
\ No newline at end of file
+    timings.report(url, to_file=settings.getBool('save_timings', False))
\ No newline at end of file
@@ -0,0 +1,46 @@
+import xbmcgui
+
+from .constants import SCHEDULE_PROPERTY
+from .util import get_database
+
+_window = xbmcgui.Window(10000)
+
+#Due times live in the db (indexed on due, so the earliest is always one lookup away)
+#The next due time is published to a window property for the service to sleep on
+def set(key, due):
+    get_database().Schedule.set(key=key, due=int(due))
+    publish()
+
+def remove(key):
+    Schedule = get_database().Schedule
+    Schedule.delete_where(Schedule.key == key)
+    publish()
+
+def replace(prefix, dues):
+    database = get_database()
+    Schedule = database.Schedule
+
+    with database.db.atomic():
+        Schedule.delete_where(Schedule.key.startswith(prefix))
+        for key, due in dues.items():
+            Schedule.set(key=key, due=int(due))
+
+    publish()
+
+def next_due():
+    Schedule = get_database().Schedule
+    row = Schedule.select(Schedule.due).order_by(Schedule.due).first()
+    return row.due if row else None
+
+def publish():
+    due = next_due()
+    if due is None:
+        _window.clearProperty(SCHEDULE_PROPERTY)
+    else:
+        _window.setProperty(SCHEDULE_PROPERTY, str(due))
+
+def next_run():
+    try:
+        return int(_window.getProperty(SCHEDULE_PROPERTY))
+    except:
+        return None
@@ -2,23 +2,37 @@ import time
 import xbmc
 import random
 
-from . import settings
+from . import settings, broker, schedule
 from .router import url_for
-from .constants import ROUTE_SERVICE, ROUTE_SERVICE_INTERVAL
+from .constants import ROUTE_SERVICE, ROUTE_SERVICE_INTERVAL, ROUTE_SERVICE_POLL
 
-def run(interval=ROUTE_SERVICE_INTERVAL):
+def run(interval=ROUTE_SERVICE_INTERVAL, broker_hosts=()):
     url = url_for(ROUTE_SERVICE)
     cmd = 'XBMC.RunPlugin({0})'.format(url)
     last_run = 0
 
     monitor = xbmc.Monitor()
 
-    delay = settings.getInt('service_delay', 0) or random.randint(10, 60)
-    monitor.waitForAbort(delay)
+    if settings.getBool('use_broker', False):
+        broker.start(broker_hosts)
 
-    while not monitor.abortRequested():
-        if time.time() - last_run >= interval:
-            xbmc.executebuiltin(cmd)
-            last_run = time.time()
-            
-        monitor.waitForAbort(random.randint(5, 20))
\ No newline at end of file
+    try:
+        delay = settings.getInt('service_delay', 0) or random.randint(10, 60)
+        monitor.waitForAbort(delay)
+
+        while not monitor.abortRequested():
+            now = time.time()
+            due = schedule.next_run()
+
+            #Run on the interval to re-sync, or as soon as something scheduled is due
+            if now - last_run >= interval or (due and last_run < due <= now):
+                xbmc.executebuiltin(cmd)
+                last_run = now
+
+            wait = last_run + interval - now
+            if due and due > now:
+                wait = min(wait, due - now)
+
+            monitor.waitForAbort(max(1, min(wait, ROUTE_SERVICE_POLL)))
+    finally:
+        broker.stop()
\ No newline at end of file
@@ -1,8 +1,10 @@
+from urlparse import urlparse
+
 import requests
 
-from . import userdata, settings
+from . import userdata, settings, timings, broker
 from .log import log
-from .constants import SESSION_TIMEOUT, SESSION_ATTEMPTS, SESSION_CHUNKSIZE
+from .constants import SESSION_TIMEOUT, SESSION_ATTEMPTS, SESSION_CHUNKSIZE, BROKER_URL_HEADER, BROKER_VERIFY_HEADER, BROKER_ERROR_HEADER
 
 class Session(requests.Session):
     def __init__(self, headers=None, cookies_key=None, base_url='{}', timeout=None, attempts=None):
@@ -14,6 +16,7 @@ class Session(requests.Session):
         self._timeout     = timeout or SESSION_TIMEOUT
         self._attempts    = attempts or SESSION_ATTEMPTS
         self._verify      = settings.getBool('verify_ssl', True)
+        self._broker      = settings.getBool('use_broker', False) and not self._cookies_key
 
         self.headers.update(self._headers)
         if self._cookies_key:
@@ -27,15 +30,45 @@ class Session(requests.Session):
         kwargs['verify'] = verify or self._verify
         attempts = attempts or self._attempts
 
+        broker_url = None
+        if self._broker and url.startswith('https://') and not kwargs.get('stream'):
+            broker_url = broker.url()
+
         for i in range(1, attempts+1):
             log('Attempt {}/{}: {} {} {}'.format(i, attempts, method, url, kwargs if method.lower() != 'post' else ""))
 
             try:
-                return super(Session, self).request(method, url, **kwargs)
+                with timings.timed('request.{}'.format(urlparse(url).netloc)):
+                    if broker_url:
+                        resp = self._broker_request(method, url, broker_url, **kwargs)
+                        if resp is not None:
+                            return resp
+
+                        log('Broker unavailable. Requesting directly')
+                        broker_url = None
+
+                    return super(Session, self).request(method, url, **kwargs)
             except:
                 if i == attempts:
                     raise
 
+    #Send via the service's connection broker which keeps connections open between plugin calls
+    def _broker_request(self, method, url, broker_url, headers=None, params=None, **kwargs):
+        #The broker only sees this header, so the query string has to be in it
+        headers = dict(headers or {})
+        headers[BROKER_URL_HEADER]    = requests.Request(method, url, params=params).prepare().url
+        headers[BROKER_VERIFY_HEADER] = 'true' if kwargs.pop('verify', True) else 'false'
+
+        try:
+            resp = super(Session, self).request(method, broker_url, headers=headers, **kwargs)
+        except requests.ConnectionError:
+            return None
+
+        if resp.headers.get(BROKER_ERROR_HEADER):
+            return None
+
+        return resp
+
     def save_cookies(self):
         if not self._cookies_key:
             raise Exception('A cookies key needs to be set to save cookies')
@@ -1,9 +1,25 @@
 import json
 
+from . import signals
 from .constants import ADDON
+from .log import log
+
+#Each getSetting crosses into Kodi, so values are kept for the rest of the dispatch
+_snapshot = {}
+_saved    = [0]
+
+@signals.on(signals.BEFORE_DISPATCH)
+def reset():
+    _snapshot.clear()
+    _saved[0] = 0
+
+@signals.on(signals.AFTER_DISPATCH)
+def report():
+    log.debug('Settings: {} Kodi calls saved ({} settings read)'.format(_saved[0], len(_snapshot)))
 
 def open():
     ADDON.openSettings()
+    _snapshot.clear()
 
 def getDict(key, default=None):
     try:
@@ -47,10 +63,18 @@ def setBool(key, value=True):
     set(key, 'true' if value else 'false')
 
 def get(key, default=''):
-    return ADDON.getSetting(key) or default
+    try:
+        value = _snapshot[key]
+        _saved[0] += 1
+    except KeyError:
+        value = _snapshot[key] = ADDON.getSetting(key)
+
+    return value or default
 
 def set(key, value=''):
-    ADDON.setSetting(key, str(value))
+    value = str(value)
+    ADDON.setSetting(key, value)
+    _snapshot[key] = value
 
 FRESH = getBool('_fresh', True)
 if FRESH:
@@ -1,6 +1,7 @@
 from contextlib import contextmanager
 from collections import defaultdict
 
+from . import timings
 from .log import log
 from .exceptions import Error
 
@@ -23,7 +24,8 @@ def on(signal):
 def emit(signal, *args, **kwargs):
     log.debug("SIGNAL: {}".format(signal))
     for f in _signals.get(signal, []):
-        f(*args, **kwargs)
+        with timings.timed('{}.{}'.format(signal, f.__name__)):
+            f(*args, **kwargs)
 
 @contextmanager
 def throwable():
@@ -0,0 +1,98 @@
+import re
+import time
+import calendar
+
+from . import signals
+from .util import lazy_import
+
+#Timestamps are plain UTC epoch seconds, so listings don't need arrow
+_ISO8601 = re.compile(r'^(\d{4})-(\d{2})-(\d{2})[T ](\d{2}):(\d{2})(?::(\d{2})(?:\.\d+)?)?(Z|[+-]\d{2}:?\d{2})?$')
+
+_now      = []
+_parsed   = {}
+_humanize = {}
+
+@signals.on(signals.BEFORE_DISPATCH)
+def reset():
+    del _now[:]
+    _parsed.clear()
+
+#Same moment for every item in a dispatch
+def now():
+    if not _now:
+        _now.append(time.time())
+
+    return _now[0]
+
+def parse(value):
+    try:
+        return _parsed[value]
+    except KeyError:
+        pass
+
+    match = _ISO8601.match(value)
+    if match:
+        year, month, day, hour, minute, second, zone = match.groups()
+        timestamp = calendar.timegm((int(year), int(month), int(day), int(hour), int(minute), int(second or 0)))
+
+        if zone and zone != 'Z':
+            offset = (int(zone[1:3]) * 60 + int(zone[-2:])) * 60
+            timestamp -= offset if zone[0] == '+' else -offset
+    else:
+        timestamp = lazy_import('arrow').get(value).timestamp
+
+    _parsed[value] = timestamp
+    return timestamp
+
+def _months(timestamp):
+    date = time.gmtime(timestamp)
+    return date.tm_year * 12 + date.tm_mon
+
+#Same thresholds and wording as arrow's english humanize
+def humanize(timestamp, other=None):
+    if other is None:
+        other = now()
+
+    delta = int(timestamp - other)
+    sign  = -1 if delta < 0 else 1
+    diff  = abs(delta)
+
+    if diff < 10:
+        return 'just now'
+    elif diff < 45:
+        unit, count = 'seconds', diff
+    elif diff < 90:
+        unit, count = 'minute', 1
+    elif diff < 2700:
+        unit, count = 'minutes', max(diff // 60, 2)
+    elif diff < 5400:
+        unit, count = 'hour', 1
+    elif diff < 79200:
+        unit, count = 'hours', max(diff // 3600, 2)
+    elif diff < 172800:
+        unit, count = 'day', 1
+    elif diff < 554400:
+        unit, count = 'days', max(diff // 86400, 2)
+    elif diff < 907200:
+        unit, count = 'week', 1
+    elif diff < 2419200:
+        unit, count = 'weeks', max(diff // 604800, 2)
+    elif diff < 3888000:
+        unit, count = 'month', 1
+    elif diff < 29808000:
+        unit, count = 'months', max(abs(_months(timestamp) - _months(other)), 2)
+    elif diff < 47260800:
+        unit, count = 'year', 1
+    else:
+        unit, count = 'years', max(diff // 31536000, 2)
+
+    key = (sign, unit, count)
+    if key not in _humanize:
+        if count == 1:
+            text = 'an {}'.format(unit) if unit == 'hour' else 'a {}'.format(unit)
+        else:
+            text = '{} {}'.format(count, unit)
+
+        _humanize[key] = 'in {}'.format(text) if sign > 0 else '{} ago'.format(text)
+
+    return _humanize[key]
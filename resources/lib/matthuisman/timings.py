@@ -0,0 +1,77 @@
+import os
+import json
+import threading
+from time import time
+from functools import wraps
+from contextlib import contextmanager
+
+from .constants import TIMINGS_FILE, TIMINGS_MAX_ROWS
+from .log import log
+
+_lock    = threading.Lock()
+_timings = {}
+_start   = [time()]
+
+def reset():
+    with _lock:
+        _timings.clear()
+        _start[0] = time()
+
+def add(name, seconds):
+    with _lock:
+        row = _timings.setdefault(name, [0, 0.0])
+        row[0] += 1
+        row[1] += seconds
+
+@contextmanager
+def timed(name):
+    start = time()
+    try:
+        yield
+    finally:
+        add(name, time() - start)
+
+# @timings.timer('display')
+def timer(name):
+    def decorator(f):
+        @wraps(f)
+        def decorated_function(*args, **kwargs):
+            with timed(name):
+                return f(*args, **kwargs)
+        return decorated_function
+    return decorator
+
+def summary(url):
+    with _lock:
+        return {
+            'url': url,
+            'time': int(_start[0]),
+            'total': round((time() - _start[0])*1000, 1),
+            'timings': dict((name, [row[0], round(row[1]*1000, 1)]) for name, row in _timings.items()),
+        }
+
+def save(data):
+    rows = []
+
+    path = os.path.dirname(TIMINGS_FILE)
+    if not os.path.exists(path):
+        os.makedirs(path)
+
+    if os.path.exists(TIMINGS_FILE):
+        with open(TIMINGS_FILE) as f:
+            rows = f.read().splitlines()[-(TIMINGS_MAX_ROWS-1):]
+
+    rows.append(json.dumps(data, sort_keys=True))
+
+    with open(TIMINGS_FILE, 'w') as f:
+        f.write('\n'.join(rows) + '\n')
+
+def report(url, to_file=False):
+    data = summary(url)
+    log('Timings: {}'.format(json.dumps(data, sort_keys=True)))
+
+    if to_file:
+        try:
+            save(data)
+        except Exception as e:
+            log.exception(e)
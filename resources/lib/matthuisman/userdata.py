@@ -1,23 +1,60 @@
+import threading
+from contextlib import contextmanager
+
 from . import settings
 from .constants import USERDATA_KEY
 
 _userdata = settings.getDict(USERDATA_KEY, {})
+_lock     = threading.RLock()
+_batch    = []
+_dirty    = []
 
 def get(key, default=None):
     return _userdata.get(key, default)
 
 def set(key, value):
-    _userdata[key] = value
-    save()
+    with _lock:
+        _userdata[key] = value
+        save()
 
+#Writing rewrites all of settings.xml, so inside a batch it waits for flush
 def save():
+    with _lock:
+        if _batch:
+            _dirty[:] = [True]
+        else:
+            _write()
+
+def _write():
     settings.setDict(USERDATA_KEY, _userdata)
+    del _dirty[:]
+
+def flush():
+    with _lock:
+        if _dirty:
+            _write()
+
+# with userdata.batch():
+@contextmanager
+def batch():
+    with _lock:
+        _batch.append(True)
+
+    try:
+        yield
+    finally:
+        with _lock:
+            _batch.pop()
+            if not _batch:
+                flush()
 
 def delete(key):
-    if key in _userdata:
-        del _userdata[key]
-        save()
+    with _lock:
+        if key in _userdata:
+            del _userdata[key]
+            save()
     
 def clear():
-    _userdata.clear()
-    save()
\ No newline at end of file
+    with _lock:
+        _userdata.clear()
+        save()
@@ -1,6 +1,10 @@
 import os
+import sys
 import time
+import importlib
 import hashlib
+import threading
+from Queue import Queue, Empty
 from datetime import datetime
 
 import xbmc
@@ -27,6 +31,99 @@ def md5sum(filepath):
 
     return hashlib.md5(open(filepath,'rb').read()).hexdigest()
 
+_import_lock = threading.RLock()
+
+def _absolute_name(name, package=None):
+    if not name.startswith('.'):
+        return name
+
+    level = len(name) - len(name.lstrip('.'))
+    base  = package.rsplit('.', level - 1)[0]
+    return '{}.{}'.format(base, name[level:]) if name[level:] else base
+
+#Checked by name, so other threads importing at the same time don't get logged as ours
+def lazy_import(name, package=None):
+    if _absolute_name(name, package) in sys.modules:
+        return importlib.import_module(name, package)
+
+    with _import_lock:
+        if _absolute_name(name, package) in sys.modules:
+            return importlib.import_module(name, package)
+
+        start  = time.time()
+        module = importlib.import_module(name, package)
+        log.debug('Lazy Import: {} ({:.1f}ms)'.format(module.__name__, (time.time() - start)*1000))
+
+    return module
+
+#peewee and the models are only imported the first time the db is used
+def get_database():
+    return lazy_import('.database', __name__.rpartition('.')[0])
+
+#Threads get their own connection, but if the db was never used there's nothing to close
+def close_database():
+    module = sys.modules.get(_absolute_name('.database', __name__.rpartition('.')[0]))
+    if module:
+        module.close()
+
+class Pool(object):
+    def __init__(self, size=4):
+        self._size    = size
+        self._queue   = Queue()
+        self._lock    = threading.Lock()
+        self._threads = []
+        self._results = {}
+        self._count   = 0
+
+    def add(self, func, *args, **kwargs):
+        with self._lock:
+            self._queue.put((self._count, func, args, kwargs))
+            self._count += 1
+
+    def start(self):
+        with self._lock:
+            self._threads = [t for t in self._threads if t.is_alive()]
+
+            for i in range(min(self._size - len(self._threads), self._queue.qsize())):
+                thread = threading.Thread(target=self._worker)
+                thread.daemon = True
+                thread.start()
+                self._threads.append(thread)
+
+    def join(self):
+        while True:
+            self.start()
+
+            for thread in self._threads:
+                thread.join()
+
+            if self._queue.empty():
+                break
+
+        with self._lock:
+            results = [self._results.get(i) for i in range(self._count)]
+
+            self._threads = []
+            self._results = {}
+            self._count   = 0
+
+        return results
+
+    def _worker(self):
+        while True:
+            try:
+                index, func, args, kwargs = self._queue.get_nowait()
+            except Empty:
+                break
+
+            try:
+                self._results[index] = func(*args, **kwargs)
+            except Exception as e:
+                log.exception(e)
+
+def playing_video():
+    return xbmc.Player().isPlayingVideo()
+
 def get_kodi_version():
     try:
         return int(xbmc.getInfoLabel("System.BuildVersion").split('.')[0])
@@ -1,20 +1,28 @@
-import arrow
+import random
+from time import time, sleep
 
-from matthuisman import plugin, gui, settings, userdata, signals, inputstream
+from matthuisman import plugin, gui, settings, userdata, signals, inputstream, cache, schedule, timestamp, alerts
 from matthuisman.exceptions import PluginError
-from matthuisman.session import Session
+from matthuisman.log import log
+from matthuisman.util import Pool, playing_video, close_database
 
 from .api import API
+from . import ranking
 from .language import _
-from .constants import HEADERS, SERVICE_TIME, LIVE_PLAY_TYPES, FROM_LIVE, FROM_START, FROM_CHOOSE, IMG_URL, SPORT_LOGO, CHANNELS_PANEL
+from .constants import HEADERS, SERVICE_TIME, LIVE_PLAY_TYPES, FROM_LIVE, FROM_START, FROM_CHOOSE, IMG_URL, SPORT_LOGO, CHANNELS_PANEL, PREFETCH_WORKERS, WARM_TIME, WARM_WITHIN, WARM_DUE_KEY, ALERT_HORIZON, ALERT_RESYNC, ALERT_RETRY, ALERT_WORKERS, STREAM_PREFETCH_LEAD, STREAM_PREFETCH_MAX, TOKEN_REFRESH_WITHIN, TOKEN_REFRESH_JITTER, TOKEN_REFRESH_ATTEMPTS, TOKEN_REFRESH_BACKOFF, TOKEN_REFRESH_RETRY, TOKEN_DUE_KEY, PAGE_SIZE
 
 api = API()
+prefetch = Pool(PREFETCH_WORKERS)
 
 @signals.on(signals.BEFORE_DISPATCH)
 def before_dispatch():
     api.new_session()
     plugin.logged_in = api.logged_in
 
+@signals.on(signals.AFTER_DISPATCH)
+def after_dispatch():
+    prefetch.join()
+
 @plugin.route('')
 def home(**kwargs):
     folder = plugin.Folder(cacheToDisc=False)
@@ -53,6 +61,7 @@ def logout(**kwargs):
         return
 
     api.logout()
+    schedule.remove(TOKEN_DUE_KEY)
     gui.refresh()
 
 @plugin.route()
@@ -87,35 +96,53 @@ def sport(slug, title, **kwargs):
     return folder
 
 @plugin.route()
-def show(id, title, **kwargs):
+def show(id, title, page=1, **kwargs):
     data = api.show(id, profile=userdata.get('profile'))
 
-    folder = plugin.Folder(title=title)
+    rows = []
     for row in data:
         if row['title'] == 'Episodes':
-            folder.add_items(_parse_contents(row.get('contents', [])))
+            rows.extend(row.get('contents', []))
 
+    folder = plugin.Folder(title=title)
+    _add_page(folder, rows, int(page), show, id=id, title=title)
     return folder
 
 @plugin.route()
-def panel(id, sport=None, **kwargs):
+def panel(id, sport=None, page=1, **kwargs):
     data = api.panel(id, sport=sport, profile=userdata.get('profile'))
     folder = plugin.Folder(title=data['title'])
-    folder.add_items(_parse_contents(data.get('contents', [])))
+    _add_page(folder, data.get('contents', []), int(page), panel, id=id, sport=sport)
     return folder
 
+#The API has no paging, so the (cached) response is sliced and only that page gets parsed
+def _add_page(folder, rows, page, route, **kwargs):
+    page_size = settings.getInt('page_size', PAGE_SIZE)
+    if page_size <= 0:
+        folder.add_items(_parse_contents(rows))
+        return
+
+    start = (page - 1) * page_size
+    folder.add_items(_parse_contents(rows[start:start+page_size]))
+
+    if len(rows) > start + page_size:
+        folder.add_item(
+            label = _(_.NEXT_PAGE, page=page+1, _bold=True),
+            path  = plugin.url_for(route, page=page+1, **kwargs),
+        )
+
 @plugin.route()
 def alert(asset, title, **kwargs):
-    alerts = userdata.get('alerts', [])
-
-    if asset not in alerts:
-        alerts.append(asset)
+    if not alerts.exists(asset):
+        alerts.add(asset, title=title)
+        #Wake the service so it looks up the start time
+        schedule.set(_alert_due_key(asset), time())
         gui.notification(title, heading=_.REMINDER_SET)
     else:
         alerts.remove(asset)
+        schedule.remove(_alert_due_key(asset))
         gui.notification(title, heading=_.REMINDER_REMOVED)
 
-    userdata.set('alerts', alerts)
     gui.refresh()
 
 @plugin.route()  
@@ -160,37 +187,60 @@ def _select_profile():
 def _get_stream(asset):
     streams = [asset['recommendedStream']]
     streams.extend(asset['alternativeStreams'])
-
-    playable = ['hls-ts', 'dash']
-    streams  = [s for s in streams if s['mediaFormat'] in playable]
-    streams  = sorted(streams, key=lambda k: (k['mediaFormat'] == 'hls-ts', k['provider'] == 'AKAMAI'), reverse=True)
+    streams = ranking.rank(streams)
 
     if not streams:
         raise PluginError(_.NO_STREAM)
 
+    if settings.getBool('race_streams', False):
+        return ranking.race(streams, prefetch)
+
+    #Probes run while playback is starting and compete with it for bandwidth, so they are opt-in
+    if settings.getBool('probe_streams', False):
+        prefetch.add(_threaded, ranking.probe_streams, streams)
+
     return streams[0]
 
+#Worker threads get their own db connection, so close it when done
+def _threaded(func, *args, **kwargs):
+    try:
+        return func(*args, **kwargs)
+    finally:
+        close_database()
+
 def _landing(name, sport=None):
     items = []
 
-    for row in api.landing(name, sport=sport, profile=userdata.get('profile')):
+    profile = userdata.get('profile')
+    #Without the cache a prefetched panel would just be thrown away
+    to_prefetch = settings.getInt('prefetch_panels', 0) if cache.enabled() else 0
+
+    for row in api.landing(name, sport=sport, profile=profile):
         if row['panelType'] == 'hero-carousel' and row.get('contents') and settings.getBool('show_hero_contents', True):
             items.extend(_parse_contents(row['contents']))
 
         elif row['panelType'] != 'hero-carousel' and row.get('contents'):
+            if to_prefetch > 0:
+                prefetch.add(_threaded, api.panel, row['id'], sport=sport, profile=profile)
+                to_prefetch -= 1
+
             items.append(plugin.Item(
                 label = row['title'],
                 path  = plugin.url_for(panel, id=row['id'], sport=sport),
+                cache_key = cache.key_for(api.panel, row['id'], sport=sport, profile=profile),
                 art   = {
                     'thumb': _get_image(row['contents'][0]['data']['asset'], 'panel', 'thumb'),
                     'fanart': _get_image(row['contents'][0]['data']['asset'], 'panel', 'fanart'),
                 },
             ))
 
+    prefetch.start()
+
     return items
 
 def _parse_contents(rows):
     items = []
+    live  = []
 
     for row in rows:
         asset = row['data']['asset']
@@ -198,11 +248,29 @@ def _parse_contents(rows):
         if row['contentType'] == 'video':
             items.append(_parse_video(asset))
 
+            if asset['isLive'] and asset.get('isStreaming', False):
+                live.append(asset['id'])
+
         elif row['contentType'] == 'section':
             items.append(_parse_show(asset))
 
+    if live and _prefetch_streams():
+        prefetch.add(_threaded, _resolve_streams, live[:STREAM_PREFETCH_MAX])
+        prefetch.start()
+
     return items
 
+def _prefetch_streams():
+    return api.logged_in and cache.enabled() and settings.getBool('prefetch_streams', False)
+
+#One after the other, so an expired token is only refreshed once
+def _resolve_streams(ids):
+    for id in ids:
+        try:
+            api.stream(id)
+        except Exception as e:
+            log.debug('Failed to resolve stream {}: {}'.format(id, e))
+
 def _parse_show(asset):
     return plugin.Item(
         label = asset['title'],
@@ -214,6 +282,7 @@ def _parse_show(asset):
             'plot': asset.get('description-short'),
         },
         path = plugin.url_for(show, id=asset['id'], title=asset['title']),
+        cache_key = cache.key_for(api.show, asset['id'], profile=userdata.get('profile')),
     )
 
 def _get_image(asset, media_type, img_type='thumb', width=None):
@@ -227,18 +296,16 @@ def _get_image(asset, media_type, img_type='thumb', width=None):
         return IMG_URL.format(asset['image-pack'], 'hero-default', width or 1920)
 
 def _parse_video(asset):
-    alerts = userdata.get('alerts', [])
-    
-    now   = arrow.now()
-    start = arrow.get(asset['transmissionTime'])
+    now   = timestamp.now()
+    start = timestamp.parse(asset['transmissionTime'])
     precheck = start
 
     if 'preCheckTime' in asset:
-        precheck = arrow.get(asset['preCheckTime'])
+        precheck = timestamp.parse(asset['preCheckTime'])
         if precheck > start:
             precheck = start
 
-    start_from = (start - precheck).seconds
+    start_from = int(start - precheck)
     
     item = plugin.Item(
         label = asset['title'],
@@ -259,10 +326,10 @@ def _parse_video(asset):
 
     if now < start:
         is_live = True
-        item.label = _(_.STARTING_SOON, title=asset['title'], humanize=start.humanize())
+        item.label = _(_.STARTING_SOON, title=asset['title'], humanize=timestamp.humanize(start, now))
         toggle_alert = plugin.url_for(alert, asset=asset['id'], title=asset['title'])
 
-        if asset['id'] not in userdata.get('alerts', []):
+        if not alerts.exists(asset['id']):
             item.info['playcount'] = 0
             item.context.append((_.SET_REMINDER, "XBMC.RunPlugin({})".format(toggle_alert)))
         else:
@@ -292,9 +359,10 @@ def play(id, start_from=0, play_type=FROM_LIVE, **kwargs):
     start_from = int(start_from)
     play_type  = int(play_type)
 
-    start = arrow.get(asset.get('preCheckTime', asset['transmissionTime']))
-    if start > arrow.now():
-        raise PluginError(_(_.GAME_NOT_STARTED, start=start.humanize()))
+    #Not the dispatch's now, the service may have waited on a prompt before playing
+    start = timestamp.parse(asset.get('preCheckTime', asset['transmissionTime']))
+    if start > time():
+        raise PluginError(_(_.GAME_NOT_STARTED, start=timestamp.humanize(start, time())))
 
     stream = _get_stream(asset)
 
@@ -324,27 +392,95 @@ def play(id, start_from=0, play_type=FROM_LIVE, **kwargs):
 
     return item
 
+#Registered before the alerts so a reminder that starts playback already has a fresh token
+@signals.on(signals.ON_SERVICE)
+def refresh_token():
+    if not api.logged_in:
+        return
+
+    #Jitter so several devices on one account don't all refresh at once
+    within = TOKEN_REFRESH_WITHIN + random.randint(0, TOKEN_REFRESH_JITTER)
+
+    for i in range(1, TOKEN_REFRESH_ATTEMPTS+1):
+        try:
+            if api.refresh_token(within):
+                log('Token Refreshed')
+            break
+        except Exception as e:
+            log.debug('Token refresh attempt {}/{} failed: {}'.format(i, TOKEN_REFRESH_ATTEMPTS, e))
+            if i == TOKEN_REFRESH_ATTEMPTS:
+                schedule.set(TOKEN_DUE_KEY, time() + TOKEN_REFRESH_RETRY)
+                return
+
+            sleep(TOKEN_REFRESH_BACKOFF ** i)
+
+    expires = userdata.get('expires')
+    if expires:
+        schedule.set(TOKEN_DUE_KEY, expires - TOKEN_REFRESH_WITHIN)
+
 @signals.on(signals.ON_SERVICE)
 def service():
-    alerts = userdata.get('alerts', [])
-    if not alerts:
+    #Notified alerts are kept a run, so a run during the prompt doesn't notify again
+    alerts.remove_notified()
+
+    rows = alerts.pending()
+    if not rows:
         return
 
-    now     = arrow.now()
+    now     = timestamp.now()
+    horizon = settings.getInt('alert_horizon', ALERT_HORIZON) * 60
+    lead    = STREAM_PREFETCH_LEAD if _prefetch_streams() else 0
     notify  = []
-    _alerts = []
-    
-    for id in alerts:
-        asset = api.event(id)
-        start = arrow.get(asset.get('preCheckTime', asset['transmissionTime']))
+    remove  = []
+    resolve = []
+    dues    = {}
+
+    #Only poll events we don't know the start of or that start soon
+    to_poll = [row.asset for row in alerts.due(now + horizon, now - ALERT_RESYNC)]
+
+    for row in rows:
+        if row.asset not in to_poll:
+            dues[_alert_due_key(row.asset)] = _alert_due(row.start, now, lead)
+
+    pool = Pool(ALERT_WORKERS)
+    for id in to_poll:
+        pool.add(_threaded, api.event, id)
+
+    for id, asset in zip(to_poll, pool.join()):
+        if not asset:
+            continue
+
+        start = timestamp.parse(asset.get('preCheckTime', asset['transmissionTime']))
+        alerts.update(id, title=asset['title'], start=int(start), checked=int(now))
 
         #If we are streaming and started less than 10 minutes ago
-        if asset.get('isStreaming', False) and (now - start).total_seconds() <= 60*10:
+        if asset.get('isStreaming', False) and now - start <= 60*10:
             notify.append(asset)
+            alerts.update(id, notified=True)
         elif start > now:
-            _alerts.append(id)
+            dues[_alert_due_key(id)] = _alert_due(start, now, lead)
+            if start - now <= lead:
+                resolve.append(id)
+        elif now - start <= 60*10:
+            #Started but not streaming yet, check again shortly
+            dues[_alert_due_key(id)] = now + ALERT_RETRY
+            if lead:
+                resolve.append(id)
+        else:
+            remove.append(id)
+
+    if remove:
+        alerts.remove(*remove)
+
+    schedule.replace(_alert_due_key(''), dues)
+
+    #Resolved before the prompt, so Watch doesn't race a background request for the same stream
+    if notify and lead:
+        _resolve_streams([asset['id'] for asset in notify])
 
-    userdata.set('alerts', _alerts)
+    if resolve and lead:
+        prefetch.add(_threaded, _resolve_streams, resolve)
+        prefetch.start()
 
     for asset in notify:
         if not gui.yes_no(_(_.EVENT_STARTED, event=asset['title']), yeslabel=_.WATCH, nolabel=_.CLOSE):
@@ -352,11 +488,52 @@ def service():
 
         with signals.throwable():
             start_from = 1
-            start      = arrow.get(asset['transmissionTime'])
+            start      = timestamp.parse(asset['transmissionTime'])
             
             if start < now and 'preCheckTime' in asset:
-                precheck = arrow.get(asset['preCheckTime'])
+                precheck = timestamp.parse(asset['preCheckTime'])
                 if precheck < start:
-                    start_from = (start - precheck).seconds
+                    start_from = int(start - precheck)
+
+            play(id=asset['id'], start_from=start_from, play_type=settings.getEnum('live_play_type', LIVE_PLAY_TYPES, default=FROM_CHOOSE))
+
+def _alert_due_key(id):
+    return 'alert.{}'.format(id)
+
+#Wake up early enough to resolve the stream before it starts
+def _alert_due(start, now, lead=0):
+    if start - lead > now:
+        return start - lead
+
+    return start
+
+@signals.on(signals.ON_SERVICE)
+def warm_cache():
+    if not api.logged_in or not settings.getBool('warm_cache', False) or not cache.enabled():
+        schedule.remove(WARM_DUE_KEY)
+        return
+
+    schedule.set(WARM_DUE_KEY, time() + WARM_TIME)
+
+    #Don't compete with playback for bandwidth
+    if playing_video():
+        log('Warm Cache: Skipped while playing video')
+        return
+
+    profile = userdata.get('profile')
+
+    _warm(api.sport_menu)
+    _warm(api.landing, 'home', sport=None, profile=profile)
+    _warm(api.panel, CHANNELS_PANEL)
+
+def _warm(func, *args, **kwargs):
+    key = cache.key_for(func, *args, **kwargs)
+    #Rows are still served while stale, so only refresh one that would drop out before the next run
+    if not key or cache.remaining(key, stale=True) > WARM_WITHIN:
+        return
 
-            play(id=asset['id'], start_from=start_from, play_type=settings.getEnum('live_play_type', LIVE_PLAY_TYPES, default=FROM_CHOOSE))
\ No newline at end of file
+    try:
+        func(*args, _skip_cache=True, **kwargs)
+        log('Warm Cache: Refreshed {}'.format(func.__name__))
+    except Exception as e:
+        log.exception(e)
\ No newline at end of file
@@ -0,0 +1,88 @@
+from time import time
+
+from matthuisman import settings, probe
+from matthuisman.util import lazy_import
+
+from .constants import HEADERS, STREAM_FORMATS, STREAM_WEIGHTS, STREAM_PROVIDER, STREAM_PROBE_INTERVAL, STREAM_RACE_MAX, STREAM_RACE_TIMEOUT, STREAM_RACE_WAIT
+
+_scorers = []
+
+# @ranking.scorer('latency')
+def scorer(name):
+    def decorator(f):
+        _scorers.append((name, f))
+        return f
+    return decorator
+
+def weight(name):
+    return settings.getInt('stream_weight_{}'.format(name), STREAM_WEIGHTS.get(name, 0))
+
+def key(stream):
+    return 'stream.{}'.format(stream['provider'])
+
+#Each scorer returns 0 (worst) to 1 (best) and is multiplied by its weight
+@scorer('format')
+def _format(stream, stats):
+    return 1 if stream['mediaFormat'] == STREAM_FORMATS[0] else 0
+
+@scorer('provider')
+def _provider(stream, stats):
+    return 1 if stream['provider'] == STREAM_PROVIDER else 0
+
+@scorer('latency')
+def _latency(stream, stats):
+    row = stats.get(key(stream))
+    if not row or not row.latency:
+        return 0.5
+
+    return 1 / (1 + row.latency)
+
+@scorer('failures')
+def _failures(stream, stats):
+    row = stats.get(key(stream))
+    if not row:
+        return 1
+
+    return 1 - row.failures
+
+def rank(streams):
+    streams = [s for s in streams if s['mediaFormat'] in STREAM_FORMATS]
+    if not streams:
+        return []
+
+    stats   = probe.stats(set(key(s) for s in streams))
+    weights = [(weight(name), f) for name, f in _scorers]
+
+    def score(stream):
+        return sum(w * f(stream, stats) for w, f in weights if w)
+
+    return sorted(streams, key=score, reverse=True)
+
+def _session():
+    session = lazy_import('.matthuisman.session', __name__.rpartition('.')[0])
+    return session.Session(HEADERS)
+
+#Probe the top few at once and go with whichever manifest answers first
+def race(streams, pool, count=STREAM_RACE_MAX):
+    candidates = streams[:count]
+    index = probe.first(_session(), [(key(s), s['manifest']['uri']) for s in candidates], pool, timeout=STREAM_RACE_TIMEOUT, wait=STREAM_RACE_WAIT)
+    if index is None:
+        return streams[0]
+
+    return candidates[index]
+
+#Measure providers we haven't heard from in a while, one manifest each
+def probe_streams(streams):
+    stats   = probe.stats(set(key(s) for s in streams))
+    session = _session()
+    probed  = []
+
+    for stream in streams:
+        _key = key(stream)
+        row  = stats.get(_key)
+
+        if _key in probed or (row and row.updated > time() - STREAM_PROBE_INTERVAL):
+            continue
+
+        probe.probe(session, stream['manifest']['uri'], key=_key)
+        probed.append(_key)
@@ -1,4 +1,4 @@
-from resources.lib.constants import SERVICE_TIME
+from resources.lib.constants import SERVICE_TIME, BROKER_HOSTS
 from resources.lib.matthuisman.service import run
 
-run(SERVICE_TIME)
\ No newline at end of file
+run(SERVICE_TIME, broker_hosts=BROKER_HOSTS)
\ No newline at end of file